@@ -1,23 +1,1261 @@
 # Importing Toolkits
+import bisect
+import contextvars
+import copy
+import gzip
+import hashlib
+import io
+import json
+import math
+import mmap
+import operator
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from urllib.parse import urlencode
+
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
 
 # Importing Dash Components
-from dash import Dash, html, dcc, Input, Output, dash_table
+from dash import Dash, html, dcc, Input, Output, State, ALL, ClientsideFunction, DiskcacheManager, ctx, dash_table
+from dash.exceptions import PreventUpdate
+from dash.dash_table.Format import Format, Group
 import dash_bootstrap_components as dbc
+from flask import Response, g, has_request_context, jsonify, request
+
+try:
+    import diskcache
+except ImportError:  # only needed for BACKGROUND_CALLBACKS=1
+    diskcache = None
+
+try:
+    import brotli
+except ImportError:  # responses are gzipped only
+    brotli = None
+
+try:
+    import redis
+except ImportError:  # only needed for a redis:// RENDER_CACHE_URL
+    redis = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # snapshots are skipped and the CSV is parsed on every start
+    pa = pq = None
 
 used_color = ["#ADA2FF", "#C0DEFF", "#FCDDB0", "#FF9F9F", "#EDD2F3", "#98EECC", "#79E0EE"]
+
+
+# ----------- Metrics -----------
+class Histogram:
+    """Latency histogram in the Prometheus text format, one series per label set."""
+    buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels[label]) for label in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][bisect.bisect_left(self.buckets, seconds)] += 1
+            series[1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+
+        for key, (counts, total) in sorted(series.items()):
+            labels = [f'{name}="{escape_label(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for le, count in zip([*map(str, self.buckets), "+Inf"], counts):
+                cumulative += count
+                bucket_labels = ",".join([*labels, f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            series_labels = ",".join(labels)
+            lines.append(f"{self.name}_sum{{{series_labels}}} {total}")
+            lines.append(f"{self.name}_count{{{series_labels}}} {cumulative}")
+        return lines
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+callback_seconds = Histogram(
+    "hr_callback_duration_seconds", "Time spent inside each Dash callback.", ["route", "callback"])
+serialization_seconds = Histogram(
+    "hr_callback_serialization_seconds",
+    "Time a callback request spends outside the callback itself, mostly JSON encoding of the response.",
+    ["route", "callback"])
+builder_seconds = Histogram(
+    "hr_builder_duration_seconds",
+    "Time spent in each chart, card and table builder, split into filtering the data and building the result.",
+    ["builder", "phase"])
+
+# Filtering time of the builder running on this thread, see `timed_filter`
+builder_state = threading.local()
+
+
+def timed_filter(func):
+    """Adds the call's duration to the filter phase of the builder running on this thread."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if hasattr(builder_state, "filter_seconds"):
+                builder_state.filter_seconds += time.perf_counter() - start
+
+    return wrapper
+
+
+def timed_builder(build):
+    """Records how long a builder spends filtering the data versus building its figure, cards or rows."""
+
+    @wraps(build)
+    def wrapper(*args):
+        outer_filter_seconds = getattr(builder_state, "filter_seconds", None)
+        builder_state.filter_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            return build(*args)
+        finally:
+            total = time.perf_counter() - start
+            filter_time = builder_state.filter_seconds
+            builder_seconds.observe(filter_time, builder=build.__name__, phase="filter")
+            builder_seconds.observe(total - filter_time, builder=build.__name__, phase="build")
+            if outer_filter_seconds is None:
+                del builder_state.filter_seconds
+            else:
+                builder_state.filter_seconds = outer_filter_seconds + total
+
+    return wrapper
+
+
+def route_label(pathname):
+    """The page route of a pathname, or "other"; pathnames come from clients and would add a series per URL."""
+    return pathname if pathname in pages_dict.values() else "other"
+
+
+def timed_callback(route=None):
+    """Records a callback's latency under `route`, or under the page route of its first argument when None."""
+
+    def decorator(callback):
+        @wraps(callback)
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                seconds = time.perf_counter() - start
+                the_route = route_label(args[0]) if route is None else route
+                callback_seconds.observe(seconds, route=the_route, callback=callback.__name__)
+                if has_request_context():
+                    # The rest of the request is measured by `observe_serialization`
+                    g.hr_callback = (the_route, callback.__name__, seconds)
+
+        return wrapper
+
+    return decorator
+
+
 # ----------- Loading Dataset -----------
-df = pd.read_csv("HR_Final_Database.csv")
-df["Hire_Date"] = pd.to_datetime((df["Hire_Date"]))
-df["Birth_Date"] = pd.to_datetime((df["Birth_Date"]))
-df["Termination_Date"] = pd.to_datetime((df["Termination_Date"]))
+DATA_FILE = "HR_Final_Database.csv"
+# Typed copy of DATA_FILE, reused while the CSV is unchanged
+SNAPSHOT_FILE = "HR_Final_Database.parquet"
+# Bump whenever the typed columns change, so older snapshots are rebuilt
+SNAPSHOT_VERSION = 3
+
+category_columns = ["Gender", "Education", "City", "Position", "Termination_Reason",
+                    "Overdue_Vacation", "Department", "Manager"]
+int_columns = {"ID": "int32", "Performance_Review": "int8", "Salary": "int32"}
+date_columns = ["Birth_Date", "Hire_Date", "Last_Promotion_Date", "Termination_Date"]
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return f"v{SNAPSHOT_VERSION}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def month_and_day(dates):
+    """Months since 1970 and day of month (0-based) of a datetime Series, as int arrays.
+
+    Plain integer arithmetic on the days since 1970 (the proleptic Gregorian calendar),
+    several times faster than the `.dt` accessors or numpy's calendar casts.
+    """
+    # Days counted from 0000-03-01; int32 divides a lot faster than int64
+    days = (dates.to_numpy(dtype="datetime64[ns]").view("int64") // 86_400_000_000_000).astype("int32") + 719_468
+    era = days // 146_097
+    day_of_era = days - era * 146_097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36_524 - day_of_era // 146_096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    # Months counted from March, so the leap day comes last
+    march_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * march_month + 2) // 5
+    month = march_month + 2 - 12 * (march_month >= 10)
+    year = year_of_era + era * 400 + (month < 2)
+    return (year - 1970) * 12 + month, day
+
+
+def months_between(start, end):
+    """Whole months from `start` to `end`, both datetime Series; -1 where `start` is missing.
+
+    A `start` after `end` (e.g. a promotion dated after the last day) counts as 0 months,
+    so it never reads as missing.
+    """
+    start_month, start_day = month_and_day(start)
+    end_month, end_day = month_and_day(end)
+    months = end_month - start_month - (end_day < start_day)
+    return np.where(start.isna().to_numpy(), -1, np.maximum(months, 0))
+
+
+def years_between(start, end):
+    """Whole years from `start` to `end`, both datetime Series."""
+    return months_between(start, end) // 12
+
+
+# Band label -> lowest value in the band
+AGE_BANDS = {"Under 25": 0, "25-34": 25, "35-44": 35, "45-54": 45, "55+": 55}
+TENURE_BANDS = {"Under 1 Year": 0, "1-2 Years": 1, "3-4 Years": 3, "5-9 Years": 5, "10+ Years": 10}
+PROMOTION_BANDS = {"Never Promoted": -1, "Under 1 Year": 0, "1-2 Years": 12, "3+ Years": 36}
+
+
+def band(values, bands):
+    """Ordered categories of the bands `values` fall into."""
+    codes = np.searchsorted(list(bands.values()), values, side="right") - 1
+    return pd.Categorical.from_codes(codes, categories=list(bands), ordered=True)
+
+
+def add_derived_columns(data):
+    # Ages and tenures are taken at the latest date in the data, so they do not drift between restarts
+    reference_date = data[date_columns[1:]].max().max()
+    reference = pd.Series(reference_date, index=data.index)
+    # Leavers stop counting tenure and time since promotion on their last day
+    last_day = data["Termination_Date"].fillna(reference)
+
+    data["Hire_Year"] = data["Hire_Date"].dt.year.astype("int16")
+    data["Age"] = years_between(data["Birth_Date"], reference).astype("int8")
+    data["Tenure"] = years_between(data["Hire_Date"], last_day).astype("int8")
+    data["Months_Since_Promotion"] = months_between(data["Last_Promotion_Date"], last_day).astype("int16")
+
+    # Bands are categories like Department, so filtering or grouping by them is a cube lookup
+    data["Age_Band"] = band(data["Age"], AGE_BANDS)
+    data["Tenure_Band"] = band(data["Tenure"], TENURE_BANDS)
+    data["Promotion_Band"] = band(data["Months_Since_Promotion"], PROMOTION_BANDS)
+    return data
+
+
+def read_typed_csv(path):
+    data = pd.read_csv(
+        path,
+        index_col=0,
+        dtype={**{col: "category" for col in category_columns}, **int_columns},
+        parse_dates=date_columns,
+    )
+    # Rows are kept in hire-date order, so every year filter is a contiguous slice of `df`
+    data = data.sort_values("Hire_Date", kind="mergesort", ignore_index=True)
+    return add_derived_columns(data)
+
+
+def read_snapshot(signature, snapshot_path=SNAPSHOT_FILE):
+    """Returns the snapshot's typed dataset if it was built from the source with this signature."""
+    if pq is None or not os.path.exists(snapshot_path):
+        return None
+
+    try:
+        table = pq.read_table(snapshot_path)
+    except (OSError, pa.ArrowInvalid):  # unreadable or cut short, built again from the source
+        return None
+    if (table.schema.metadata or {}).get(b"hr_source") != signature.encode():
+        return None
+    return table.to_pandas()
+
+
+def load_dataset(path=DATA_FILE, snapshot_path=SNAPSHOT_FILE):
+    """Returns the typed dataset and its signature, from the snapshot when it matches the CSV."""
+    signature = source_signature(path)
+    data = read_snapshot(signature, snapshot_path)
+    if data is None:
+        data = read_typed_csv(path)
+        save_snapshot(data, signature, snapshot_path)
+    return data, signature
+
+
+def save_snapshot(data, signature, snapshot_path=SNAPSHOT_FILE):
+    if pq is None:
+        return
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, b"hr_source": signature.encode()})
+    # Workers starting together never read each other's half-written snapshot
+    staging = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        pq.write_table(table, staging)
+        os.replace(staging, snapshot_path)
+    except OSError:  # read-only deployments keep working from the CSV
+        try:
+            os.remove(staging)
+        except OSError:
+            pass
+
+
+# Derived band columns the Workforce page filters and breaks down by, with their labels there
+attribute_dims = {"Age_Band": "Age Band", "Tenure_Band": "Tenure Band", "Promotion_Band": "Time Since Promotion"}
+
+
+# ----------- Filter Index -----------
+class FilterIndex:
+    """Row offsets for the sidebar filters, built once when the dataset is loaded.
+
+    The rows are sorted by hire date, so "Until" a year is a prefix of the rows and
+    "In" a year is a range of them; departments map to their sorted row positions.
+    """
+
+    def __init__(self, data):
+        self.size = len(data)
+        self.hire_years = data["Hire_Year"].to_numpy()
+        self.dep_positions = {
+            dep: positions
+            for dep, positions in data.groupby("Department", sort=False, observed=True).indices.items()
+        }
+
+    def year_bounds(self, the_year, filter_type):
+        if the_year == "All Years":
+            return 0, self.size
+
+        stop = int(np.searchsorted(self.hire_years, the_year, side="right"))
+        if filter_type == "In":
+            start = int(np.searchsorted(self.hire_years, the_year, side="left"))
+        else:
+            start = 0
+        return start, stop
+
+    def dep_rows(self, the_dep, start=0, stop=None):
+        positions = self.dep_positions.get(the_dep, np.empty(0, dtype=np.intp))
+        if stop is None:
+            stop = self.size
+        return positions[np.searchsorted(positions, start):np.searchsorted(positions, stop)]
+
+    @timed_filter
+    def rows(self, the_year, filter_type, the_dep="All Departments"):
+        """Returns a slice (year filter only) or the integer row positions matching the filters."""
+        start, stop = self.year_bounds(the_year, filter_type)
+        if the_dep == "All Departments":
+            return slice(start, stop)
+        return self.dep_rows(the_dep, start, stop)
+
+    def departments(self, the_year, filter_type):
+        """Departments with at least one hire in the year filter, in order of first hire."""
+        start, stop = self.year_bounds(the_year, filter_type)
+        first_rows = {}
+        for dep, positions in self.dep_positions.items():
+            first = np.searchsorted(positions, start)
+            if first < len(positions) and positions[first] < stop:
+                first_rows[dep] = positions[first]
+        return sorted(first_rows, key=first_rows.get)
+
+
+# ----------- Geo Reference -----------
+# Bundled copy of jasperdebie/VisInfo us-state-capitals.csv; bump GEO_VERSION whenever the file changes
+GEO_FILE = "us-state-capitals.csv"
+GEO_VERSION = 1
+geo = pd.read_csv(GEO_FILE)
+geo["name"] = geo["name"].str.strip()
+
+# USPS codes, which Plotly's built-in "USA-states" geometry is keyed by
+state_codes = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA", "Colorado": "CO",
+    "Connecticut": "CT", "Delaware": "DE", "Florida": "FL", "Georgia": "GA", "Hawaii": "HI", "Idaho": "ID",
+    "Illinois": "IL", "Indiana": "IN", "Iowa": "IA", "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA",
+    "Maine": "ME", "Maryland": "MD", "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN",
+    "Mississippi": "MS", "Missouri": "MO", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV",
+    "New Hampshire": "NH", "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY", "North Carolina": "NC",
+    "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA",
+    "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD", "Tennessee": "TN", "Texas": "TX",
+    "Utah": "UT", "Vermont": "VT", "Virginia": "VA", "Washington": "WA", "West Virginia": "WV",
+    "Wisconsin": "WI", "Wyoming": "WY",
+}
+geo["code"] = geo["name"].map(state_codes)
+
+# "tiles" draws a bubble per location over OpenStreetMap tiles, "states" an offline choropleth
+# of Plotly's bundled US states geometry that needs no network access at all
+LOCATION_MAP_MODE = os.environ.get("LOCATION_MAP_MODE", "tiles")
+# Above this many locations the bubble map bins nearby ones together (0 turns it off)
+LOCATION_MAP_MAX_MARKERS = int(os.environ.get("LOCATION_MAP_MAX_MARKERS", 1000))
+
+
+# ----------- Aggregate Cube -----------
+class HRCube:
+    """Counts and sums of the dataset over (hire year, *dims), built once at load.
+
+    Every measure is a dense array holding prefix sums over the sorted hire years,
+    so any "Until" or "In" year filter is the difference of two lookups and a chart
+    only ever touches one cell per combination of categories.
+    """
+
+    def __init__(self, data, dims, measures):
+        self.dims = list(dims)
+        self.years = np.sort(data["Hire_Year"].unique())
+        year_codes = np.searchsorted(self.years, data["Hire_Year"].to_numpy()) + 1
+
+        self.labels = {}
+        codes = [year_codes]
+        for dim in self.dims:
+            if isinstance(data[dim].dtype, pd.CategoricalDtype):
+                dim_codes, self.labels[dim] = data[dim].cat.codes.to_numpy(), data[dim].cat.categories
+            else:
+                dim_codes, self.labels[dim] = pd.factorize(data[dim], sort=True)
+            codes.append(dim_codes)
+
+        shape = (len(self.years) + 1, *[len(self.labels[dim]) for dim in self.dims])
+        # Rows with a missing category are left out of the cube
+        valid = np.logical_and.reduce([dim_codes >= 0 for dim_codes in codes])
+        cells = np.ravel_multi_index([dim_codes[valid] for dim_codes in codes], shape)
+
+        self.prefix = {}
+        for name, values in measures.items():
+            weights = None if values is None else np.asarray(values, dtype="float64")[valid]
+            totals = np.bincount(cells, weights=weights, minlength=int(np.prod(shape))).reshape(shape)
+            self.prefix[name] = totals.cumsum(axis=0)
+
+    def year_bounds(self, the_year, filter_type):
+        if the_year == "All Years":
+            return 0, len(self.years)
+
+        stop = int(np.searchsorted(self.years, the_year, side="right"))
+        start = int(np.searchsorted(self.years, the_year, side="left")) if filter_type == "In" else 0
+        return start, stop
+
+    @timed_filter
+    def totals(self, measure, the_year, filter_type, the_dep="All Departments", by=(), where=None):
+        """Totals of `measure` for the filters, as a scalar, a Series (one `by` dim) or a DataFrame (two).
+
+        `where` narrows any other dims to one label each, e.g. {"Age_Band": "25-34"}.
+        """
+        start, stop = self.year_bounds(the_year, filter_type)
+        cube = self.prefix[measure][stop] - self.prefix[measure][start]
+
+        selected = dict(where or {})
+        if the_dep != "All Departments":
+            selected["Department"] = the_dep
+        for dim, label in selected.items():
+            axis = self.dims.index(dim)
+            labels = self.labels[dim]
+            if label in labels:
+                cube = cube.take([labels.get_loc(label)], axis=axis)
+            else:
+                cube = np.zeros_like(cube.take([], axis=axis))
+
+        summed = tuple(axis for axis, dim in enumerate(self.dims) if dim not in by)
+        cube = cube.sum(axis=summed)
+
+        # Reorder the remaining axes to follow `by`
+        remaining = [dim for dim in self.dims if dim in by]
+        cube = cube.transpose([remaining.index(dim) for dim in by])
+
+        if not by:
+            return cube.item()
+        labels = [self.labels[dim][self.labels[dim] == selected[dim]] if dim in selected else self.labels[dim]
+                  for dim in by]
+        index = pd.Index(labels[0], name=by[0])
+        if len(by) == 1:
+            return pd.Series(cube, index=index, name=measure)
+        return pd.DataFrame(cube, index=index, columns=pd.Index(labels[1], name=by[1]))
+
+
+def state_matrix(location_cube):
+    """Employees of every state (rows, by USPS code) and department (columns) plus an "All Departments" column.
+
+    The Locations choropleth only ever selects one column of it.
+    """
+    counts = location_cube.totals("count", "All Years", "Until", by=("City_Key", "Department"))
+    counts = counts.drop(index=-1, errors="ignore").astype("int64")
+    counts.insert(0, "All Departments", counts.sum(axis=1))
+    counts.index = pd.Index(geo["code"].to_numpy()[counts.index], name="State")
+    counts.columns = counts.columns.astype(str)
+    return counts
+
+
+def not_empty(totals):
+    """Drops the categories (Series) or rows and columns (DataFrame) with nothing in them."""
+    if isinstance(totals, pd.DataFrame):
+        return totals.loc[totals.sum(axis=1) > 0, totals.sum(axis=0) > 0]
+    return totals[totals > 0]
+
+
+# ----------- Headcount Series -----------
+class HeadcountSeries:
+    """Monthly hires, terminations and headcount of every department, from one sweep over the events.
+
+    Hire and termination events are counted into a (department, month) grid with one
+    bincount each; the headcount at the end of every month is then the cumulative sum
+    of hires minus terminations, so a department's history is a row lookup however many
+    years and employees it covers.
+    """
+
+    def __init__(self, data):
+        hires = data["Hire_Date"].to_numpy().astype("datetime64[M]")
+        terminations = data["Termination_Date"].to_numpy().astype("datetime64[M]")
+        terminated = ~np.isnat(terminations)
+
+        dep_codes = data["Department"].cat.codes.to_numpy().astype("int64")
+        self.departments = data["Department"].cat.categories
+
+        first = hires.min()
+        last = max(hires.max(), terminations[terminated].max()) if terminated.any() else hires.max()
+        self.months = np.arange(first, last + 1)
+
+        shape = (len(self.departments), len(self.months))
+        # Rows without a department are left out, like in the cubes
+        hired = dep_codes >= 0
+        left = hired & terminated
+        hire_cells = np.ravel_multi_index([dep_codes[hired], (hires[hired] - first).astype("int64")], shape)
+        leave_cells = np.ravel_multi_index([dep_codes[left], (terminations[left] - first).astype("int64")], shape)
+
+        size = int(np.prod(shape))
+        self.hires = np.bincount(hire_cells, minlength=size).reshape(shape)
+        self.terminations = np.bincount(leave_cells, minlength=size).reshape(shape)
+        self.headcount = (self.hires - self.terminations).cumsum(axis=1)
+
+    def series(self, the_dep="All Departments", window=12):
+        """Hires, terminations, end-of-month headcount and trailing `window`-month turnover (%) by month.
+
+        Turnover is the terminations of the last `window` months over their average
+        headcount. The series starts with the department's first hire.
+        """
+        if the_dep == "All Departments":
+            rows = slice(None)
+        elif the_dep in self.departments:
+            rows = [self.departments.get_loc(the_dep)]
+        else:
+            rows = []
+
+        hires = self.hires[rows].sum(axis=0)
+        terminations = self.terminations[rows].sum(axis=0)
+        headcount = self.headcount[rows].sum(axis=0)
+        start = int(np.argmax(hires > 0)) if hires.any() else len(hires)
+        hires, terminations, headcount = hires[start:], terminations[start:], headcount[start:]
+
+        # Trailing sums as differences of cumulative sums, shorter at the start of the series
+        def trailing_sum(values):
+            totals = np.concatenate([[0], values.cumsum()])
+            ends = np.arange(1, len(values) + 1)
+            return totals[ends] - totals[np.maximum(ends - window, 0)], ends - np.maximum(ends - window, 0)
+
+        left, _ = trailing_sum(terminations)
+        staffed, months = trailing_sum(headcount)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            turnover = np.where(staffed > 0, left / (staffed / months) * 100, np.nan)
+
+        return pd.DataFrame({
+            "Hires": hires,
+            "Terminations": terminations,
+            "Headcount": headcount,
+            "Turnover": turnover,
+        }, index=pd.Index(np.datetime_as_string(self.months[start:], unit="M"), name="Month"))
+
+
+# ----------- Cohort Matrix -----------
+class CohortMatrix:
+    """Hire-year cohorts by tenure year, kept as counts that appended rows are simply added to.
+
+    Leavers are counted by department, termination reason, cohort and the tenure
+    year they left in. Employees still on staff are counted by department and hire
+    month, because how long they have been observed grows with the latest date in
+    the data. `retention` turns the counts into life-table survival rates.
+    """
+
+    def __init__(self):
+        self.departments = []
+        self.reasons = []
+        # Hire year of the first cohort and hire month (months since 1970) of the first staff column
+        self.first_year = None
+        self.first_month = None
+        # Latest hire or termination month, which the staff are observed until
+        self.as_of = None
+        self.exits = np.zeros((0, 0, 0, 0), dtype="int64")
+        self.active = np.zeros((0, 0), dtype="int64")
+
+    @classmethod
+    def from_rows(cls, data):
+        cohorts = cls()
+        cohorts.add(data)
+        return cohorts
+
+    def extended(self, rows):
+        """A copy with `rows` added, leaving this one untouched for the readers still using it."""
+        cohorts = copy.copy(self)
+        # `add` builds new count arrays, only the label lists would be shared
+        cohorts.departments = list(self.departments)
+        cohorts.reasons = list(self.reasons)
+        cohorts.add(rows)
+        return cohorts
+
+    @staticmethod
+    def label_codes(labels, values):
+        """Codes of `values` in `labels` (-1 for missing values), appending the labels not seen before."""
+        values = values.astype(object)
+        labels.extend(value for value in pd.unique(values.dropna()) if value not in labels)
+        return pd.Categorical(values, categories=labels).codes.astype("int64")
+
+    def add(self, rows):
+        rows = rows[rows["Department"].notna()]
+        if rows.empty:
+            return
+
+        hires = rows["Hire_Date"].to_numpy().astype("datetime64[M]").astype("int64")
+        leave_dates = rows["Termination_Date"].to_numpy().astype("datetime64[M]")
+        left = ~np.isnat(leave_dates)
+        leaves = leave_dates[left].astype("int64")
+
+        deps = self.label_codes(self.departments, rows["Department"])
+        reasons = self.label_codes(self.reasons, rows["Termination_Reason"][left].astype(object).fillna("Unknown"))
+
+        # Grow every axis to cover the new rows, keeping the old counts at their (shifted) place
+        years = hires // 12 + 1970
+        old_first_year = int(years.min()) if self.first_year is None else self.first_year
+        old_first_month = int(hires.min()) if self.first_month is None else self.first_month
+        first_year = min(old_first_year, int(years.min()))
+        first_month = min(old_first_month, int(hires.min()))
+        year_shift = old_first_year - first_year
+        month_shift = old_first_month - first_month
+        tenures = np.maximum((leaves - hires[left]) // 12, 0)
+
+        shape = (len(self.departments), len(self.reasons),
+                 max(year_shift + self.exits.shape[2], int(years.max()) - first_year + 1),
+                 max(self.exits.shape[3], int(tenures.max()) + 1 if left.any() else 0))
+        exits = np.zeros(shape, dtype="int64")
+        d, r, y, t = self.exits.shape
+        exits[:d, :r, year_shift:year_shift + y, :t] = self.exits
+
+        active_shape = (shape[0], max(month_shift + self.active.shape[1], int(hires.max()) - first_month + 1))
+        active = np.zeros(active_shape, dtype="int64")
+        d, m = self.active.shape
+        active[:d, month_shift:month_shift + m] = self.active
+
+        cells = np.ravel_multi_index([deps[left], reasons, years[left] - first_year, tenures], shape)
+        exits += np.bincount(cells, minlength=exits.size).reshape(shape)
+        cells = np.ravel_multi_index([deps[~left], hires[~left] - first_month], active_shape)
+        active += np.bincount(cells, minlength=active.size).reshape(active_shape)
+
+        self.exits, self.active = exits, active
+        self.first_year, self.first_month = first_year, first_month
+        self.as_of = max(first_month if self.as_of is None else self.as_of, int(hires.max()),
+                         int(leaves.max()) if left.any() else first_month)
+
+    def retention(self, the_dep="All Departments", the_reason="All Reasons"):
+        """Share (%) of each cohort (rows) still employed after 1, 2, ... years (columns).
+
+        Life-table estimate: every tenure year, the leavers for `the_reason` are divided
+        by everyone still there at its start; staff observed for a shorter time and
+        leavers for other reasons only count while they were there. Years no one of a
+        cohort has been observed for are NaN.
+        """
+        if the_dep == "All Departments":
+            deps = slice(None)
+        else:
+            deps = [self.departments.index(the_dep)] if the_dep in self.departments else []
+        exits = self.exits[deps].sum(axis=0)
+        leavers = exits.sum(axis=0)
+        if the_reason == "All Reasons":
+            events = leavers
+        else:
+            events = exits[self.reasons.index(the_reason)] if the_reason in self.reasons else np.zeros_like(leavers)
+
+        # Staff are censored in the tenure year they have reached by `as_of`
+        months = self.first_month + np.arange(self.active.shape[1])
+        staff = self.active[deps].sum(axis=0)
+        censored_at = (self.as_of - months) // 12
+        tenure_years = max(leavers.shape[1], int(censored_at.max()) + 1)
+        cohort_of = months // 12 + 1970 - self.first_year
+        censored = np.bincount(cohort_of * tenure_years + censored_at, weights=staff,
+                               minlength=leavers.shape[0] * tenure_years).reshape(leavers.shape[0], tenure_years)
+
+        padding = [(0, 0), (0, tenure_years - leavers.shape[1])]
+        events = np.pad(events, padding)
+        leaving = np.pad(leavers, padding) + censored
+        # Everyone whose exit or censoring lies in this tenure year or later
+        at_risk = leaving[:, ::-1].cumsum(axis=1)[:, ::-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            survival = np.cumprod(np.where(at_risk > 0, 1 - events / at_risk, np.nan), axis=1) * 100
+
+        cohorts = pd.Index(np.arange(self.first_year, self.first_year + leavers.shape[0]), name="Cohort")
+        frame = pd.DataFrame(survival, index=cohorts, columns=pd.Index(np.arange(1, tenure_years + 1), name="Years"))
+        # Cohorts without hires in the department
+        return frame[leaving.sum(axis=1) > 0]
+
+
+# ----------- Employees Table Store -----------
+# Table column -> dataset column
+table_columns = {
+    "Employee": "Employee",
+    "Gender": "Gender",
+    "Education": "Education",
+    "City": "City",
+    "Performance": "Performance_Review",
+    "Salary": "Salary",
+}
+
+# DataTable filter query operators by their symbols; the word forms are used as they are
+filter_operator_symbols = {">=": "ge", "<=": "le", "<": "lt", ">": "gt", "!=": "ne", "=": "eq"}
+# `{column} operator value`, the operator being the token right after the column. Its "i" prefix makes text
+# matching case-insensitive; "s" (case-sensitive) is what the table does anyway
+filter_part_pattern = re.compile(
+    r"\s*\{(?P<name>[^}]*)\}\s*(?P<case>[si]?)"
+    r"(?P<operator>[<>!]?=|[<>]|(?:ge|le|lt|gt|ne|eq|contains|datestartswith)(?=\s))"
+    r"\s*(?P<value>.*)",
+    re.DOTALL,
+)
+
+compare_operators = {
+    "ge": operator.ge, "le": operator.le, "lt": operator.lt,
+    "gt": operator.gt, "ne": operator.ne, "eq": operator.eq,
+}
+
+
+def split_filter_part(filter_part):
+    """Splits one `{column} operator value` part of a DataTable filter query.
+
+    Operator words inside the value are left alone, and case-insensitive operators keep their "i":
+
+    >>> split_filter_part("{City} contains Little Rock")
+    ('City', 'contains', 'Little Rock')
+    >>> split_filter_part("{Gender} i= male")
+    ('Gender', 'ieq', 'male')
+    """
+    match = filter_part_pattern.fullmatch(filter_part)
+    if match is None:
+        return [None] * 3
+
+    the_operator = match["operator"]
+    value_part = match["value"].strip()
+    v0 = value_part[:1]
+    if v0 and v0 == value_part[-1] and v0 in ("'", '"', "`"):
+        value = value_part[1:-1].replace("\\" + v0, v0)
+    else:
+        try:
+            value = float(value_part)
+        except ValueError:
+            value = value_part
+
+    the_operator = filter_operator_symbols.get(the_operator, the_operator)
+    return match["name"], "i" + the_operator if match["case"] == "i" else the_operator, value
+
+
+class EmployeeTableStore:
+    """Columnar copy of the employees table that is queried one page at a time.
+
+    Text columns are stored as sorted category codes, so filter predicates run once
+    per distinct value and every column has a precomputed ascending row order.
+    """
+
+    def __init__(self, data, columns):
+        self.size = len(data)
+        self.numbers = {}
+        self.codes = {}
+        self.categories = {}
+        self.ranks = {}
+        self.orders = {}
+
+        for name, source in columns.items():
+            column = data[source]
+            if pd.api.types.is_numeric_dtype(column):
+                self.numbers[name] = column.to_numpy()
+                self.ranks[name] = self.numbers[name]
+            else:
+                self.codes[name], self.categories[name] = pd.factorize(column, sort=True)
+                # Fixed-width strings rather than objects, so the shared dataset can map them too
+                self.categories[name] = np.asarray(self.categories[name], dtype=str)
+                self.ranks[name] = self.codes[name]
+            self.orders[name] = np.argsort(self.ranks[name], kind="stable")
+
+    def column_mask(self, name, the_operator, value):
+        # No operator starts with an "i" of its own
+        ignore_case = the_operator.startswith("i")
+        the_operator = the_operator.removeprefix("i")
+        if name in self.numbers:
+            values = self.numbers[name]
+            if the_operator in compare_operators and not isinstance(value, str):
+                return compare_operators[the_operator](values, value)
+            if the_operator in ("contains", "datestartswith"):
+                text = values.astype(str)
+                search = str(value).removesuffix(".0")
+                if the_operator == "contains":
+                    return np.char.find(text, search) >= 0
+                return np.char.startswith(text, search)
+            return np.zeros(self.size, dtype=bool)
+
+        value = value if isinstance(value, str) else f"{value:g}"
+        categories = self.categories[name]
+        if ignore_case:
+            categories, value = np.char.lower(categories), value.lower()
+        if the_operator in compare_operators:
+            matched = compare_operators[the_operator](categories, value).astype(bool)
+        elif the_operator == "contains":
+            matched = np.array([value in category for category in categories], dtype=bool)
+        else:
+            matched = np.array([category.startswith(value) for category in categories], dtype=bool)
+
+        # code -1 (missing value) picks the trailing False
+        return np.append(matched, False)[self.codes[name]]
+
+    @timed_filter
+    def query(self, rows, filter_query="", sort_by=None):
+        """Row positions within `rows` that pass the filter query, in the requested order."""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+
+        for filter_part in (filter_query or "").split(" && "):
+            name, the_operator, value = split_filter_part(filter_part)
+            if name in self.ranks:
+                mask &= self.column_mask(name, the_operator, value)
+
+        sort_by = [col for col in (sort_by or []) if col["column_id"] in self.ranks]
+        if not sort_by:
+            return np.flatnonzero(mask)
+
+        if len(sort_by) == 1:
+            order = self.orders[sort_by[0]["column_id"]]
+            if sort_by[0]["direction"] == "desc":
+                order = order[::-1]
+            return order[mask[order]]
+
+        positions = np.flatnonzero(mask)
+        keys = [
+            -self.ranks[col["column_id"]][positions] if col["direction"] == "desc"
+            else self.ranks[col["column_id"]][positions]
+            for col in reversed(sort_by)
+        ]
+        return positions[np.lexsort(keys)]
+
+    def records(self, positions):
+        columns = {}
+        for name in self.ranks:
+            if name in self.numbers:
+                columns[name] = self.numbers[name][positions].tolist()
+            else:
+                codes = self.codes[name][positions]
+                values = self.categories[name][codes].astype(object)
+                values[codes < 0] = None
+                columns[name] = values.tolist()
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def employee_positions(ds, the_year, filter_type, the_dep, filter_query="", sort_by=None):
+    """Rows of the employees table (and of its export) for the sidebar filters and the table's filter and sort.
+
+    A slice when nothing but the year filter applies, otherwise the row positions in table order.
+    """
+    rows = ds.filter_index.rows(the_year, filter_type, the_dep)
+    if not filter_query and not sort_by:
+        return rows
+    return ds.employees_store.query(rows, filter_query, sort_by)
+
+
+# ----------- Versioned Dataset -----------
+def dataset_version(signature):
+    # Identifies the loaded data, so cached results never outlive the data they were built from
+    return f"{signature}-geo{GEO_VERSION}"
+
+
+class Dataset:
+    """One version of the data together with every index and aggregate built from it.
+
+    Readers take the module-level `dataset` once and keep using that object, so a
+    reload that swaps in a new version never changes data under a running request.
+    """
+
+    def __init__(self, data, signature, source_size=0, source_digest="", cohort_matrix=None):
+        # Integer key of each employee's state into `geo` (-1 for unknown states); the raw
+        # values carry stray whitespace such as "\xa0Arizona", so they are stripped first
+        data["City_Key"] = pd.Categorical(data["City"].str.strip(), categories=geo["name"]).codes
+
+        self._df = data
+        # Rows of the memory-mapped copy this dataset was opened from (an Arrow table), see `share_dataset`
+        self.shared_rows = None
+        self.version = dataset_version(signature)
+        self.source_size = source_size
+        self.source_digest = source_digest
+
+        self.filter_index = FilterIndex(data)
+        self.hr_cube = HRCube(data, ["Department", "Gender", "Education"], {
+            "count": None,
+            "salary": data["Salary"],
+            "review": data["Performance_Review"],
+            "review_completed": data["Performance_Review"] == 10,
+            "terminated": data["Termination_Date"].notna(),
+            "promoted": data["Last_Promotion_Date"].notna(),
+        })
+        # Distinct positions are not additive, so positions get their own count cube
+        self.position_cube = HRCube(data, ["Department", "Position"], {"count": None})
+        # Employees per department and state, so a department's map is a single lookup
+        self.location_cube = HRCube(data, ["Department", "City_Key"], {"count": None})
+        # Employees by the derived bands, so they filter and break down charts like departments do
+        self.attribute_cube = HRCube(data, ["Department", *attribute_dims], {
+            "count": None,
+            "salary": data["Salary"],
+            "review": data["Performance_Review"],
+        })
+        self.state_matrix = state_matrix(self.location_cube)
+        self.headcount_series = HeadcountSeries(data)
+        # Appended rows only add their counts to the previous version's, see `build_dataset`
+        self.cohort_matrix = CohortMatrix.from_rows(data) if cohort_matrix is None else cohort_matrix
+        self.employees_store = EmployeeTableStore(data, table_columns)
+
+        self.years = self.hr_cube.years.tolist()
+        self.departments = data["Department"].unique().tolist()
+
+    @property
+    def df(self):
+        """The typed rows; a shared dataset only converts its Arrow rows when first asked."""
+        if self._df is None:
+            self._df = self.shared_rows.to_pandas()
+        return self._df
+
+    def rows_frame(self, positions, columns):
+        """Some rows and columns of the data; a shared dataset takes only those from its Arrow rows."""
+        if self._df is None and self.shared_rows is not None:
+            return self.shared_rows.select(columns).take(pa.array(positions)).to_pandas()
+        # Rows first, so a chunk only copies its own rows rather than the whole columns
+        return self._df.take(positions)[columns]
+
+    def __getstate__(self):
+        # The indexes and aggregates answer every request, the rows are shared as Arrow next to them
+        return {**self.__dict__, "_df": None, "shared_rows": None}
+
+
+def file_digest(path, size=None):
+    """sha1 of the first `size` bytes of a file (all of it by default)."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        remaining = os.path.getsize(path) if size is None else size
+        while remaining > 0:
+            chunk = file.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def read_appended_rows(previous, path):
+    """Typed rows added to the end of `path` since `previous` was loaded, or None if it was rewritten."""
+    size = os.path.getsize(path)
+    if not previous.source_size or size <= previous.source_size:
+        return None
+    if file_digest(path, previous.source_size) != previous.source_digest:
+        return None
+
+    with open(path, "rb") as file:
+        header = file.readline()
+        file.seek(previous.source_size - 1)
+        # The old rows have to end on a complete line for the tail to parse on its own
+        if file.read(1) != b"\n":
+            return None
+        tail = file.read()
+
+    return pd.read_csv(
+        io.BytesIO(header + tail),
+        index_col=0,
+        dtype={**{col: "category" for col in category_columns}, **int_columns},
+        parse_dates=date_columns,
+    )
+
+
+def append_rows(data, new_rows):
+    derived = ["Hire_Year", "Age", "Tenure", "Months_Since_Promotion", "Age_Band", "Tenure_Band", "Promotion_Band",
+               "City_Key"]
+    data = data.drop(columns=derived)
+    new_rows = new_rows[data.columns]
+
+    # Both sides need the same categories, otherwise the concatenated columns fall back to object
+    for col in category_columns:
+        categories = data[col].cat.categories.union(new_rows[col].cat.categories)
+        data[col] = data[col].cat.set_categories(categories)
+        new_rows[col] = new_rows[col].cat.set_categories(categories)
+
+    data = pd.concat([data, new_rows], ignore_index=True)
+    data = data.sort_values("Hire_Date", kind="mergesort", ignore_index=True)
+    return add_derived_columns(data)
+
+
+# ----------- Shared Dataset -----------
+# Built datasets are written here once and memory-mapped read-only by every worker process,
+# so their arrays live in the OS page cache instead of in each worker (HR_SHARED_DATASET_DIR="" turns it off)
+SHARED_DATASET_DIR = os.environ.get("HR_SHARED_DATASET_DIR", ".shared_dataset")
+# Bump whenever Dataset or one of its indexes changes, so older shared copies are rebuilt
+SHARED_DATASET_VERSION = 5
+# Every array starts on a cache line
+SHARED_ALIGNMENT = 64
+
+
+def shared_dataset_path(version):
+    return os.path.join(SHARED_DATASET_DIR, f"s{SHARED_DATASET_VERSION}-{version}")
+
+
+def write_shared_dataset(ds, path):
+    """Writes the rows as Arrow and every array of `ds` into one aligned file, next to a pickle of the rest."""
+    os.makedirs(SHARED_DATASET_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=SHARED_DATASET_DIR)
+    try:
+        table = pa.Table.from_pandas(ds.df, preserve_index=False)
+        with pa.OSFile(os.path.join(staging, "data.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        # Protocol 5 hands over the numpy buffers instead of copying them into the pickle
+        buffers = []
+        state = pickle.dumps(ds, protocol=5, buffer_callback=buffers.append)
+        layout = []
+        with open(os.path.join(staging, "arrays.bin"), "wb") as file:
+            for buffer in buffers:
+                raw = buffer.raw()
+                file.write(b"\0" * (-file.tell() % SHARED_ALIGNMENT))
+                layout.append((file.tell(), raw.nbytes))
+                file.write(raw)
+        with open(os.path.join(staging, "dataset.pickle"), "wb") as file:
+            pickle.dump((state, layout), file, protocol=5)
+
+        # The directory appears complete or not at all; when another worker won the race its copy is kept
+        try:
+            os.rename(staging, path)
+        except OSError:
+            if not os.path.exists(path):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    for old in os.listdir(SHARED_DATASET_DIR):
+        # Workers still on an older version mapped all its files when they opened it, so they keep reading them
+        if not old.startswith(".") and os.path.join(SHARED_DATASET_DIR, old) != path:
+            shutil.rmtree(os.path.join(SHARED_DATASET_DIR, old), ignore_errors=True)
+
+
+def open_shared_dataset(version):
+    """Maps the shared copy of a dataset version, or returns None when there is none."""
+    if not SHARED_DATASET_DIR or pa is None:
+        return None
+
+    path = shared_dataset_path(version)
+    try:
+        with open(os.path.join(path, "dataset.pickle"), "rb") as file:
+            state, layout = pickle.load(file)
+        with open(os.path.join(path, "arrays.bin"), "rb") as file:
+            arrays = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        # Mapped now rather than on first use: a newer version removes these files, the mappings outlive that
+        with pa.memory_map(os.path.join(path, "data.arrow")) as source:
+            rows = pa.ipc.open_file(source).read_all()
+    except (OSError, ValueError):
+        return None
+
+    # Every array is a read-only view into the mapping, nothing is copied
+    ds = pickle.loads(state, buffers=[arrays[offset:offset + size] for offset, size in layout])
+    ds.shared_rows = rows
+    return ds
+
+
+def share_dataset(ds):
+    """Publishes a freshly built dataset to the other workers; returns the mapped copy to use instead."""
+    if not SHARED_DATASET_DIR or pa is None:
+        return ds
+
+    path = shared_dataset_path(ds.version)
+    if not os.path.exists(path):
+        try:
+            write_shared_dataset(ds, path)
+        except OSError:  # read-only deployments keep a private copy per worker
+            return ds
+    return open_shared_dataset(ds.version) or ds
+
+
+# ----------- Excel Ingestion -----------
+# "csv" loads DATA_FILE, "xlsx" joins the normalized workbooks of the README's ERD instead
+DATA_SOURCE = os.environ.get("HR_DATA_SOURCE", "csv")
+SOURCE_WORKBOOKS = {
+    "hr": "HRDatabase.xlsx",
+    "employees": "EmployeeInformation.xlsx",
+    "departments": "DepartmentInformation.xlsx",
+}
+# Parsed sheets, keyed by the hash of their workbook
+SHEET_CACHE_DIR = ".sheet_cache"
+
+dataset_columns = ["ID", "Employee", "Gender", "Birth_Date", "Education", "City", "Position",
+                   "Performance_Review", "Salary", "Hire_Date", "Last_Promotion_Date", "Termination_Date",
+                   "Termination_Reason", "Overdue_Vacation", "Department", "Manager"]
+# Department names shortened by the notebook that produced HR_Final_Database.csv
+department_renames = {"Technology and Equipment": "Technology"}
+
+
+def read_sheet(path):
+    """Parses the first sheet of a workbook once per file content; returns the sheet and the file hash."""
+    digest = file_digest(path)
+    name = os.path.basename(path)
+    cached = os.path.join(SHEET_CACHE_DIR, f"{name}-{digest}.pkl")
+    if os.path.exists(cached):
+        return pd.read_pickle(cached), digest
+
+    sheet = pd.read_excel(path)
+    # "Birth Date" -> "Birth_Date", "Overdue Vacation?" -> "Overdue_Vacation"
+    sheet.columns = [col.strip().rstrip("?").replace(" ", "_") for col in sheet.columns]
+    try:
+        os.makedirs(SHEET_CACHE_DIR, exist_ok=True)
+        for old in os.listdir(SHEET_CACHE_DIR):
+            if old.startswith(f"{name}-"):
+                os.remove(os.path.join(SHEET_CACHE_DIR, old))
+        sheet.to_pickle(cached)
+    except OSError:  # without a writable cache every reload parses the workbook again
+        pass
+    return sheet, digest
+
+
+def workbooks_signature(hr_digest, employees_digest, deps_digest):
+    signature_digest = hashlib.sha1(f"{hr_digest}{employees_digest}{deps_digest}".encode()).hexdigest()
+    return f"v{SNAPSHOT_VERSION}-xlsx-{signature_digest[:16]}"
+
+
+def ingest_workbooks(workbooks=SOURCE_WORKBOOKS):
+    """Joins employees to their details and department managers; returns the typed dataset and its signature."""
+    hr, hr_digest = read_sheet(workbooks["hr"])
+    employees, employees_digest = read_sheet(workbooks["employees"])
+    deps, deps_digest = read_sheet(workbooks["departments"])
+    hr["Department"] = hr["Department"].replace(department_renames)
+    deps["Department"] = deps["Department"].replace(department_renames)
+
+    signature = workbooks_signature(hr_digest, employees_digest, deps_digest)
+    data = read_snapshot(signature)
+    if data is not None:
+        return data, signature
+
+    # Hash lookups of every employee's row in the details sheet and department in the bridge sheet
+    info_rows = pd.Index(employees["ID"]).get_indexer(hr["ID"])
+    dep_rows = pd.Index(deps["Department"]).get_indexer(hr["Department"])
+    matched = (info_rows >= 0) & (dep_rows >= 0)
+
+    data = hr[matched].reset_index(drop=True)
+    info = employees.iloc[info_rows[matched]].reset_index(drop=True)
+    for col in info.columns.drop("ID"):
+        data[col] = info[col]
+    data["Manager"] = deps["Manager"].to_numpy()[dep_rows[matched]]
+
+    data = data[dataset_columns].astype({**{col: "category" for col in category_columns}, **int_columns})
+    data = data.sort_values("Hire_Date", kind="mergesort", ignore_index=True)
+    data = add_derived_columns(data)
+
+    save_snapshot(data, signature)
+    return data, signature
+
+
+def build_dataset(path=DATA_FILE, previous=None):
+    """Builds a new Dataset, parsing only the appended rows when the file just grew.
+
+    A version that another worker has already built is mapped from its shared copy instead.
+    """
+    if DATA_SOURCE == "xlsx":
+        signature = workbooks_signature(*[file_digest(workbook) for workbook in SOURCE_WORKBOOKS.values()])
+        shared = open_shared_dataset(dataset_version(signature))
+        return shared or share_dataset(Dataset(*ingest_workbooks()))
+
+    shared = open_shared_dataset(dataset_version(source_signature(path)))
+    if shared is not None:
+        return shared
+
+    source_size = os.path.getsize(path)
+    source_digest = file_digest(path)
+
+    new_rows = read_appended_rows(previous, path) if previous is not None else None
+    cohort_matrix = None
+    if new_rows is not None:
+        data = append_rows(previous.df, new_rows)
+        signature = source_signature(path)
+        save_snapshot(data, signature)
+        cohort_matrix = previous.cohort_matrix.extended(new_rows)
+    else:
+        data, signature = load_dataset(path)
+
+    return share_dataset(Dataset(data, signature, source_size, source_digest, cohort_matrix))
+
+
+dataset = build_dataset()
+
+
+# ----------- Data Reload -----------
+class DatasetWatcher:
+    """Polls the data files and swaps in a rebuilt `dataset` when any of them changes.
+
+    The new version is built on the watcher thread, off the request path, and then
+    published with a single assignment.
+    """
+
+    def __init__(self, paths, interval=30.0):
+        self.paths = list(paths)
+        self.interval = interval
+        self._stats = self.file_stats()
+        self._thread = None
+
+    def file_stats(self):
+        stats = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stats.append(None)
+        return stats
+
+    def check(self):
+        """Reloads the dataset when a watched file changed since the last check; returns whether it did."""
+        global dataset
+
+        stats = self.file_stats()
+        if stats == self._stats:
+            return False
+
+        new_dataset = build_dataset(DATA_FILE, previous=dataset)
+        self._stats = stats
+        if new_dataset.version != dataset.version:
+            dataset = new_dataset
+        return True
 
-year = df["Hire_Date"].dt.year.unique().tolist()
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception:  # a half-written file is retried on the next poll
+                server.logger.exception("Reloading the HR dataset failed")
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="dataset-watcher", daemon=True)
+            self._thread.start()
+
+
+watched_files = list(SOURCE_WORKBOOKS.values()) if DATA_SOURCE == "xlsx" else [DATA_FILE]
+
+year = dataset.years.copy()
 year.insert(0, "All Years")
 
-departments = df["Department"].unique().tolist()
+departments = dataset.departments.copy()
 departments.insert(0, "All Departments")
 
 # *******************************************************************************************************
@@ -25,17 +1263,277 @@ departments.insert(0, "All Departments")
 # *******************************************************************************************************
 
 # -------------- Start The Dash App ------------------ #
-app = Dash(__name__, external_stylesheets=[dbc.themes.CERULEAN])
+app = Dash(__name__, external_stylesheets=[dbc.themes.CERULEAN], suppress_callback_exceptions=True)
+# Served by the app itself (see `chart_templates`), so it follows the app's path prefix
+app.config.external_scripts.append(app.get_relative_path("/plotly-templates.js"))
 
 # To render on web app
 server = app.server
 
+# Reloads the data in the background whenever it changes on disk (DATA_RELOAD_INTERVAL=0 turns it off).
+# Only the serving process starts it: the __main__ block below, or post_fork in gunicorn.conf.py
+dataset_watcher = DatasetWatcher(watched_files, interval=float(os.environ.get("DATA_RELOAD_INTERVAL", 30)))
+
+
+@server.before_request
+def start_request_timer():
+    g.hr_request_start = time.perf_counter()
+
+
+@server.after_request
+def observe_serialization(response):
+    if "hr_callback" in g and "hr_request_start" in g:
+        route, callback, seconds = g.hr_callback
+        serialization_seconds.observe(time.perf_counter() - g.hr_request_start - seconds,
+                                      route=route, callback=callback)
+    return response
+
+
+# ----------- Response Compression -----------
+# Callback responses, the layout and Dash's scripts are JSON and JS text that shrinks several times
+# over; brotli is used when installed and accepted, gzip otherwise (RESPONSE_COMPRESSION=0 turns it off)
+RESPONSE_COMPRESSION = os.environ.get("RESPONSE_COMPRESSION", "1") == "1"
+COMPRESSION_MIN_BYTES = 500
+compressible_types = {"application/json", "application/javascript", "text/javascript", "text/css",
+                      "text/html", "text/plain"}
+# Compressed bodies of the responses that do not change, i.e. Dash's fingerprinted scripts (cached
+# for a year) and the ones with an ETag, by path, ETag and encoding
+compressed_bodies = {}
+
+
+def accepted_encoding():
+    accepted = request.headers.get("Accept-Encoding", "")
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_body(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+@server.after_request
+def compress_response(response):
+    if (not RESPONSE_COMPRESSION or response.direct_passthrough or response.is_streamed
+            or response.mimetype not in compressible_types or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = accepted_encoding()
+    body = response.get_data()
+    if encoding is None or len(body) < COMPRESSION_MIN_BYTES:
+        return response
+
+    etag = response.headers.get("ETag")
+    if etag is None and (response.cache_control.max_age or 0) < 86400:
+        compressed = compress_body(body, encoding)
+    else:
+        compressed = compressed_bodies.get((request.path, etag, encoding))
+        if compressed is None:
+            compressed = compressed_bodies[request.path, etag, encoding] = compress_body(body, encoding)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    if etag is not None:
+        # The compressed body is a different representation of the resource, revalidated on its own ETag
+        response.set_etag(f"{response.get_etag()[0]}-{encoding}", weak=True)
+        return response.make_conditional(request)
+    return response
+
+
+# ----------- Chart Templates -----------
+# Figures name their chart template (see `FigureTemplate`) instead of carrying its ~7KB of JSON;
+# the browser loads every template once from here and assets/templates.js fills them in before drawing
+chart_templates_script = "window.plotlyTemplates = {};\n".format(json.dumps(
+    {name: pio.templates[name].to_plotly_json() for name in ("plotly_white", "plotly_dark")},
+    cls=PlotlyJSONEncoder, separators=(",", ":"),
+))
+
+
+@server.route(f"{app.config.routes_pathname_prefix}plotly-templates.js")
+def chart_templates():
+    response = Response(chart_templates_script, mimetype="application/javascript")
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+
+# ----------- Data Export -----------
+# Rows per chunk of a download; only one chunk of the exported rows is ever held in memory
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 50_000))
+export_types = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands out whatever was written to it since the last `drain`."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_frames(ds, positions, chunk_rows=EXPORT_CHUNK_ROWS):
+    """The exported columns of `positions` (a slice or row positions), `chunk_rows` rows at a time."""
+    if isinstance(positions, slice):
+        start, stop = positions.start or 0, positions.stop
+        chunks = (np.arange(first, min(first + chunk_rows, stop)) for first in range(start, stop, chunk_rows))
+    else:
+        chunks = (positions[first:first + chunk_rows] for first in range(0, len(positions), chunk_rows))
+
+    empty = True
+    for chunk in chunks:
+        empty = False
+        yield ds.rows_frame(chunk, dataset_columns)
+    if empty:
+        # Still one (empty) frame, so the file gets its header or schema
+        yield ds.rows_frame(np.arange(0), dataset_columns)
+
+
+def csv_stream(frames):
+    for i, frame in enumerate(frames):
+        yield frame.to_csv(index=False, header=i == 0, date_format="%Y-%m-%d").encode()
+
+
+def parquet_stream(frames):
+    # Every chunk becomes a row group; the footer that indexes them is written last
+    sink = ChunkSink()
+    writer = None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def parse_sort(sort):
+    """DataTable `sort_by` from the "Salary:desc,Employee:asc" form of the export URL."""
+    sort_by = []
+    for part in filter(None, sort.split(",")):
+        column_id, _, direction = part.rpartition(":")
+        sort_by.append({"column_id": column_id, "direction": direction})
+    return sort_by
+
+
+def export_url(file_format, the_year, filter_type, the_dep, filter_query, sort_by):
+    query = {"year": the_year, "filter_type": filter_type, "department": the_dep}
+    if filter_query:
+        query["filter"] = filter_query
+    if sort_by:
+        query["sort"] = ",".join(f"{col['column_id']}:{col['direction']}" for col in sort_by)
+    return f"/export/{file_format}?{urlencode(query)}"
+
+
+@server.route("/export/<file_format>")
+def export_data(file_format):
+    """Streams the employees of a sidebar state (and table filter and sort) as CSV or Parquet."""
+    if file_format not in export_types:
+        return jsonify({"error": f"Unknown export format {file_format}"}), 404
+    if file_format == "parquet" and pq is None:
+        return jsonify({"error": "Parquet exports need pyarrow"}), 501
+
+    ds = dataset
+    the_year = request.args.get("year", "All Years")
+    filter_type = request.args.get("filter_type", "Until")
+    the_dep = request.args.get("department", "All Departments")
+    if the_year != "All Years":
+        the_year = int(the_year) if the_year.isdigit() else None
+    if the_year not in ["All Years", *ds.years] or filter_type not in ("Until", "In"):
+        return jsonify({"error": "Unknown year or filter type"}), 400
+
+    # Filtering and sorting only touch the indexes; the rows themselves are read chunk by chunk
+    positions = employee_positions(ds, the_year, filter_type, the_dep,
+                                   request.args.get("filter", ""), parse_sort(request.args.get("sort", "")))
+    frames = export_frames(ds, positions)
+    body = csv_stream(frames) if file_format == "csv" else parquet_stream(frames)
+
+    name = "-".join(str(value) for value in (the_year, filter_type, the_dep))
+    name = "".join(char if char.isalnum() else "-" for char in name).lower()
+    return Response(body, mimetype=export_types[file_format], headers={
+        "Content-Disposition": f'attachment; filename="hr-employees-{name}.{file_format}"',
+    })
+
+
+@server.route("/metrics")
+def metrics():
+    """Latency histograms, figure cache and dataset metrics of this worker in the Prometheus text format."""
+    cache = figure_cache.stats()
+    ds = dataset
+    lines = [
+        *callback_seconds.render(),
+        *serialization_seconds.render(),
+        *builder_seconds.render(),
+        "# HELP hr_figure_cache_hits_total Figure cache lookups that found a figure.",
+        "# TYPE hr_figure_cache_hits_total counter",
+        f"hr_figure_cache_hits_total {cache['hits']}",
+        "# HELP hr_figure_cache_misses_total Figure cache lookups that had to build the figure.",
+        "# TYPE hr_figure_cache_misses_total counter",
+        f"hr_figure_cache_misses_total {cache['misses']}",
+        "# HELP hr_figure_cache_entries Figures held in the cache.",
+        "# TYPE hr_figure_cache_entries gauge",
+        f"hr_figure_cache_entries {cache['entries']}",
+        "# HELP hr_figure_cache_bytes Serialized size of the cached figures.",
+        "# TYPE hr_figure_cache_bytes gauge",
+        f"hr_figure_cache_bytes {cache['bytes']}",
+        "# HELP hr_dataset_info Version of the dataset being served.",
+        "# TYPE hr_dataset_info gauge",
+        f'hr_dataset_info{{version="{escape_label(ds.version)}"}} 1',
+        "# HELP hr_dataset_rows Employees in the dataset being served.",
+        "# TYPE hr_dataset_rows gauge",
+        f"hr_dataset_rows {ds.filter_index.size}",
+        "# HELP hr_cache_warmup_ready Whether the figure cache warm-up has finished once.",
+        "# TYPE hr_cache_warmup_ready gauge",
+        f"hr_cache_warmup_ready {int(cache_warmer.ready)}",
+    ]
+    if render_cache is not None:
+        shared = render_cache.stats()
+        lines += [
+            "# HELP hr_render_cache_hits_total Shared render cache lookups answered by another worker's render.",
+            "# TYPE hr_render_cache_hits_total counter",
+            f"hr_render_cache_hits_total {shared['hits']}",
+            "# HELP hr_render_cache_misses_total Shared render cache lookups this worker had to render.",
+            "# TYPE hr_render_cache_misses_total counter",
+            f"hr_render_cache_misses_total {shared['misses']}",
+            "# HELP hr_render_cache_waits_total Polls while another worker was rendering the same entry.",
+            "# TYPE hr_render_cache_waits_total counter",
+            f"hr_render_cache_waits_total {shared['waits']}",
+        ]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
 # Pages Navigator
 pages_dict = {
     "Home": "/",
     "Departments": "/Departments",
     "Locations": "/Locations",
     "Performance": "/Performance",
+    "Trends": "/Trends",
+    "Cohorts": "/Cohorts",
+    "Workforce": "/Workforce",
 }
 
 # Sidebar Style
@@ -198,30 +1696,20 @@ sidebar = html.Div(
 # page content
 content = html.Div(id="page-content", children=[], style=content_style)
 
+# Styles and chart templates of both themes, filled in below the page layouts
+theme_styles_store = dcc.Store(id="theme-styles")
+
 # ►►► App Layout
 app.layout = html.Div([
     dcc.Location(id="page-url"),
     sidebar,
     # header,
     content,
+    theme_styles_store,
     html.Div(id="output-text")
 ], className="container-fluid", style={"background-color": "#fafafa"})
 
 
-def filter_the_data(the_year, filter_type):
-    df_filtered = ""
-    if the_year == "All Years":
-        df_filtered = df.copy()
-    else:
-        if filter_type == "In":
-            year_filt = (df["Hire_Date"].dt.year == the_year)
-        else:
-            year_filt = (df["Hire_Date"].dt.year <= the_year)
-        df_filtered = df[year_filt].copy()
-
-    return df_filtered
-
-
 def custome_chart_layout(fig, title_size=28, showlegend=False):
     fig.update_layout(
         showlegend=showlegend,
@@ -239,24 +1727,512 @@ def custome_chart_layout(fig, title_size=28, showlegend=False):
     )
 
 
-# ---------------------- Visualizations Graphs Functions ----------------------
-# ====================== Home Page ================================
-def create_home_cards(the_year, filter_type):
-    df_filtered = filter_the_data(the_year, filter_type)
+# ----------- Figure Cache -----------
+class FigureCache:
+    """Bounded LRU cache for the figures and page layouts of the `cached_figure` functions.
+
+    Entries are evicted least recently used first once either `max_entries`
+    or `max_bytes` (measured on the serialized figure) is exceeded.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Evicted entries per dataset version (the second item of every key)
+        self.evicted = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, fig, size=None):
+        if size is None:
+            size = len(json.dumps(fig, cls=PlotlyJSONEncoder))
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (fig, size)
+            self.current_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+                evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evicted[evicted_key[1]] = self.evicted.get(evicted_key[1], 0) + 1
+
+    def reserve(self, entries):
+        """Raises `max_entries` to at least `entries`."""
+        with self._lock:
+            self.max_entries = max(self.max_entries, entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# With FIGURE_CACHE_WARMUP=1 the cache holds the warmed charts on top of FIGURE_CACHE_MAX_ENTRIES
+FIGURE_CACHE_MAX_ENTRIES = int(os.environ.get("FIGURE_CACHE_MAX_ENTRIES", 512))
+figure_cache = FigureCache(
+    max_entries=FIGURE_CACHE_MAX_ENTRIES,
+    max_bytes=int(os.environ.get("FIGURE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+)
 
-    emp_numbers = df_filtered["ID"].nunique()
 
-    available_position = df_filtered["Position"].nunique()
+# ----------- Shared Render Cache -----------
+# Figures and page layouts shared by every worker: "" (off), a directory, or redis://host:port/db
+RENDER_CACHE_URL = os.environ.get("RENDER_CACHE_URL", "")
+RENDER_CACHE_TTL = int(os.environ.get("RENDER_CACHE_TTL", 3600))
+
+
+class RenderCache:
+    """Serialized render results shared between workers, with one computing worker per missing entry.
+
+    Entries are JSON, so a cached figure or layout is exactly what Dash would send to the
+    browser. A worker that misses takes the entry's lock and renders it; the others wait
+    for the entry to appear (up to `lock_timeout`) instead of rendering it as well.
+    Subclasses implement `load`, `store`, `acquire` and `release`.
+    """
+
+    lock_timeout = 30.0
+    wait_interval = 0.05
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    @staticmethod
+    def entry_name(key):
+        return hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()
+
+    def get_or_compute(self, key, compute):
+        """Returns the value and its serialized size, rendering it with `compute` only if no worker has."""
+        name = self.entry_name(key)
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            payload = self.load(name)
+            if payload is not None:
+                try:
+                    value = json.loads(payload)
+                except ValueError:  # a damaged entry is rendered and stored again
+                    pass
+                else:
+                    self.hits += 1
+                    return value, len(payload)
+
+            if self.acquire(name):
+                self.misses += 1
+                try:
+                    value = compute()
+                    payload = json.dumps(value, cls=PlotlyJSONEncoder)
+                    self.store(name, payload)
+                finally:
+                    self.release(name)
+                return value, len(payload)
+
+            if time.monotonic() > deadline:  # the lock holder is stuck, render without sharing
+                self.misses += 1
+                value = compute()
+                return value, len(json.dumps(value, cls=PlotlyJSONEncoder))
+            self.waits += 1
+            time.sleep(self.wait_interval)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "waits": self.waits}
+
+
+class DiskRenderCache(RenderCache):
+    """Entries are files in `directory`, locks are files created exclusively next to them."""
+
+    def __init__(self, directory, ttl=3600):
+        super().__init__(ttl)
+        self.directory = directory
+        self.stores = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self, name):
+        path = os.path.join(self.directory, name)
+        # Missing, expired, truncated or foreign files are all a miss
+        try:
+            with open(path) as file:
+                expires, payload = file.read().split("\n", 1)
+            if float(expires) < time.time():
+                return None
+        except (OSError, ValueError):
+            return None
+        return payload
+
+    def store(self, name, payload):
+        path = os.path.join(self.directory, name)
+        staging = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(staging, "w") as file:
+            file.write(f"{time.time() + self.ttl}\n{payload}")
+        os.replace(staging, path)
+
+        self.stores += 1
+        if self.stores % 256 == 0:
+            self.prune()
+
+    def acquire(self, name):
+        lock = os.path.join(self.directory, f"{name}.lock")
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            pass
+        # A worker killed while rendering leaves its lock behind
+        try:
+            if os.path.getmtime(lock) < time.time() - self.lock_timeout:
+                os.remove(lock)
+        except OSError:
+            pass
+        return False
+
+    def release(self, name):
+        try:
+            os.remove(os.path.join(self.directory, f"{name}.lock"))
+        except OSError:
+            pass
+
+    def prune(self):
+        """Removes the expired entries, e.g. those of replaced dataset versions."""
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if "." not in name:
+                    with open(path) as file:
+                        expired = float(file.readline()) < now
+                else:  # locks and half-written entries of crashed workers
+                    expired = os.path.getmtime(path) < now - self.lock_timeout
+                if expired:
+                    os.remove(path)
+            except (OSError, ValueError):
+                pass
+
+
+class RedisRenderCache(RenderCache):
+    """Entries live in any server speaking the Redis protocol and expire there after `ttl`."""
+
+    def __init__(self, url, ttl=3600):
+        super().__init__(ttl)
+        self.client = redis.Redis.from_url(url)
+        self.tokens = threading.local()
+
+    def load(self, name):
+        payload = self.client.get(f"hr:render:{name}")
+        return None if payload is None else payload.decode()
+
+    def store(self, name, payload):
+        self.client.set(f"hr:render:{name}", payload, ex=self.ttl)
+
+    def acquire(self, name):
+        self.tokens.token = f"{os.getpid()}-{threading.get_ident()}-{time.time()}"
+        return bool(self.client.set(f"hr:lock:{name}", self.tokens.token, nx=True,
+                                    px=int(self.lock_timeout * 1000)))
+
+    def release(self, name):
+        # Only our own lock, it may have expired and been taken by another worker meanwhile
+        if self.client.get(f"hr:lock:{name}") == self.tokens.token.encode():
+            self.client.delete(f"hr:lock:{name}")
+
+
+def create_render_cache(url, ttl):
+    if not url:
+        return None
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        if redis is None:
+            server.logger.warning("RENDER_CACHE_URL needs the redis package, the shared render cache is off")
+            return None
+        return RedisRenderCache(url, ttl)
+    return DiskRenderCache(url.removeprefix("file://"), ttl)
+
+
+render_cache = create_render_cache(RENDER_CACHE_URL, RENDER_CACHE_TTL)
+
+
+# ----------- Background Callbacks -----------
+# BACKGROUND_CALLBACKS=1 runs the heavy callbacks in their own process (needs dash[diskcache]),
+# keeping the request threads free; results are kept per dataset version like the render cache
+BACKGROUND_CACHE_DIR = ".background_cache"
+
+
+def create_background_manager():
+    """The background callback manager, or None when BACKGROUND_CALLBACKS is off or cannot run."""
+    if os.environ.get("BACKGROUND_CALLBACKS", "0") != "1":
+        return None
+    try:
+        if diskcache is None:
+            raise ImportError("No module named 'diskcache'")
+        # DiskcacheManager imports multiprocess and psutil itself
+        return DiskcacheManager(
+            diskcache.Cache(BACKGROUND_CACHE_DIR), cache_by=[lambda: dataset.version], expire=RENDER_CACHE_TTL)
+    except ImportError as error:
+        server.logger.error("BACKGROUND_CALLBACKS=1 needs the dash[diskcache] extra (pip install \"dash[diskcache]\"), "
+                            "the callbacks run in the request threads instead: %s", error)
+        return None
+
+
+background_callback_manager = create_background_manager()
+
+
+def background_options(progress_id):
+    """Extra `app.callback` arguments that run a heavy callback in the background, if enabled.
+
+    A newer call of the same callback (a filter change) terminates the job it supersedes;
+    leaving the page cancels it. `progress_id` is shown with the job's progress while it runs.
+    """
+    if background_callback_manager is None:
+        return {}
+    return {
+        "background": True,
+        "manager": background_callback_manager,
+        "progress": [Output(component_id=progress_id, component_property="label")],
+        "running": [(Output(component_id=progress_id, component_property="style"),
+                     {"display": "flex"}, {"display": "none"})],
+        "cancel": [Input(component_id="page-url", component_property="pathname")],
+    }
 
-    avg_salary = df_filtered["Salary"].mean()
 
-    return emp_numbers, available_position, f"{avg_salary:,.0f}"
+def with_progress(callback):
+    """Passes a `set_progress` function to the callback; a no-op one outside of the background."""
+    if background_callback_manager is not None:
+        return callback
+
+    @wraps(callback)
+    def wrapper(*args):
+        return callback(lambda label: None, *args)
+
+    return wrapper
+
+
+# The dataset a `cached_figure` call keyed its result on, for everything the chart reads
+pinned_dataset = contextvars.ContextVar("pinned_dataset", default=None)
+
+
+def current_dataset():
+    """The dataset pinned for the chart being built, or the module-level one outside of a build."""
+    ds = pinned_dataset.get()
+    return dataset if ds is None else ds
+
+
+def cached_figure(create_chart):
+    """Memoizes a chart (or page layout) function on its arguments and the dataset version.
+
+    Lookups go to this worker's `figure_cache` first, then to the shared `render_cache`.
+    The chart reads the same dataset the key was taken from, even when a reload lands meanwhile.
+    """
+
+    @wraps(create_chart)
+    def wrapper(*args):
+        ds = current_dataset()
+        key = (create_chart.__name__, ds.version, *args)
+        fig = figure_cache.get(key)
+        if fig is None:
+            token = pinned_dataset.set(ds)
+            try:
+                if render_cache is None:
+                    fig = create_chart(*args)
+                    figure_cache.put(key, fig)
+                else:
+                    fig, size = render_cache.get_or_compute(key, lambda: create_chart(*args))
+                    figure_cache.put(key, fig, size)
+            finally:
+                pinned_dataset.reset(token)
+        return fig
+
+    return wrapper
+
+
+# ----------- Figure Templates -----------
+class FigureTemplate:
+    """Layout and trace skeleton of a Plotly Express chart, built once per chart theme.
+
+    `build(data, chart_theme)` makes the chart with px from the `sample` data; its layout
+    and its first trace without the `data_keys` arrays are kept. `figure` then only fills
+    the arrays of a request into plain dict copies of the skeleton, so px argument
+    processing and graph_objects validation are skipped on every later call.
+
+    The skeleton names its chart template instead of embedding it, see `chart_templates`,
+    and the arrays are shortened by `compact_numbers` before they are sent.
+    """
+
+    def __init__(self, build, sample, data_keys):
+        self.build = build
+        self.sample = sample
+        self.data_keys = data_keys
+        self._skeletons = {}
+        self._lock = threading.Lock()
+
+    def skeleton(self, chart_theme):
+        if chart_theme not in self._skeletons:
+            with self._lock:
+                if chart_theme not in self._skeletons:
+                    fig = self.build(self.sample(), chart_theme).to_plotly_json()
+                    trace = {key: value for key, value in fig["data"][0].items() if key not in self.data_keys}
+                    self._skeletons[chart_theme] = ({**fig["layout"], "template": chart_theme}, trace)
+        return self._skeletons[chart_theme]
+
+    def figure(self, chart_theme, traces, **layout):
+        """A figure dict with one skeleton trace per item of `traces`, updated with that item.
+
+        Nested dicts such as `marker` are merged one level deep, as is `layout`.
+        """
+        base_layout, base_trace = self.skeleton(chart_theme)
+        return {
+            "data": [merge_figure_dict(base_trace, compact_trace(trace)) for trace in traces],
+            "layout": merge_figure_dict(base_layout, layout),
+        }
 
 
-def create_gender_chart(the_year, filter_type, chart_theme):
-    df_filtered = filter_the_data(the_year, filter_type)
+def merge_figure_dict(base, update):
+    merged = dict(base)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            value = {**base[key], **value}
+        merged[key] = value
+    return merged
+
+
+# Plenty for any axis, hover label or map position the charts show
+FIGURE_SIGNIFICANT_DIGITS = 6
+
+
+def compact_numbers(values):
+    """Float arrays (or lists and scalars) rounded to FIGURE_SIGNIFICANT_DIGITS, whole-valued ones as ints.
+
+    Means and coordinates otherwise serialize with all 17 digits of a double.
+    """
+    if isinstance(values, float):
+        return compact_numbers(np.array([values]))[0].item()
+    if isinstance(values, list) and values and isinstance(values[0], float):
+        return compact_numbers(np.array(values)).tolist()
+    if not isinstance(values, np.ndarray) or values.dtype.kind != "f" or not values.size:
+        return values
+    finite = np.isfinite(values)
+    if finite.all() and (values % 1 == 0).all():
+        return values.astype("int64")
+
+    # Gaps (NaN) stay as they are
+    magnitude = np.floor(np.log10(np.abs(np.where(finite & (values != 0), values, 1))))
+    scale = 10.0 ** (FIGURE_SIGNIFICANT_DIGITS - 1 - magnitude)
+    return np.round(values * scale) / scale
+
+
+def compact_trace(trace):
+    return {key: {k: compact_numbers(v) for k, v in value.items()} if isinstance(value, dict)
+            else compact_numbers(value) for key, value in trace.items()}
+
+
+def figure_template(sample, data_keys=("x", "y")):
+    """Turns a px chart function into a `FigureTemplate` built from `sample()` data."""
+
+    def decorator(build):
+        return FigureTemplate(build, sample, data_keys)
+
+    return decorator
+
+
+def category_traces(values, colors, key_axis="x", value_axis="y"):
+    """One single-bar trace per category, coloured like px does for `color=<the categories>`."""
+    return [
+        {key_axis: [name], value_axis: [value], "name": name, "legendgroup": name, "offsetgroup": name,
+         "marker": {"color": colors[i % len(colors)]}}
+        for i, (name, value) in enumerate(zip(values.index.tolist(), values.tolist()))
+    ]
+
+
+def column_traces(frame, colors, key_axis="x", value_axis="y", offsetgroup=True):
+    """One trace per column of a wide frame, as px draws a frame without `x`/`y`."""
+    keys = frame.index.tolist()
+    traces = []
+    for i, name in enumerate(frame.columns.tolist()):
+        trace = {key_axis: keys, value_axis: frame[name].to_numpy(), "name": name, "legendgroup": name,
+                 "marker": {"color": colors[i % len(colors)]}}
+        if offsetgroup:
+            trace["offsetgroup"] = name
+        traces.append(trace)
+    return traces
+
+
+# ----------- KPI Engine -----------
+@dataclass(frozen=True)
+class KpiSummary:
+    """Every headline metric of the Home and Performance cards for one filter state."""
+    emp_numbers: int
+    available_position: int
+    avg_salary: float
+    performance_rate: float
+    turnover_rate: float
+    termination: int
+    promotions: int
+
+    def home_cards(self):
+        return self.emp_numbers, self.available_position, f"{self.avg_salary:,.0f}"
+
+    def performance_cards(self):
+        return f"{self.performance_rate:0.2f}%", f"{self.turnover_rate:0.2f}%", self.termination, self.promotions
+
+
+def compute_kpis(the_year, filter_type, the_dep="All Departments"):
+    ds = current_dataset()
+
+    def total(measure):
+        return ds.hr_cube.totals(measure, the_year, filter_type, the_dep)
+
+    # Every row is one employee, so the head count is the row count
+    rows = int(total("count"))
+    positions = ds.position_cube.totals("count", the_year, filter_type, the_dep, by=("Position",))
+    termination = int(total("terminated"))
+
+    return KpiSummary(
+        emp_numbers=rows,
+        available_position=int((positions > 0).sum()),
+        avg_salary=total("salary") / rows if rows else 0.0,
+        # Performance Review Completion Rate
+        performance_rate=total("review_completed") / rows * 100 if rows else 0.0,
+        # Turnover Rate
+        turnover_rate=termination / rows * 100 if rows else 0.0,
+        termination=termination,
+        promotions=int(total("promoted")),
+    )
+
+
+# ---------------------- Visualizations Graphs Functions ----------------------
+# ====================== Home Page ================================
+@timed_builder
+def create_home_cards(the_year, filter_type):
+    return compute_kpis(the_year, filter_type).home_cards()
 
-    gender = df_filtered["Gender"].value_counts()
+
+def gender_counts(the_year, filter_type):
+    gender = not_empty(current_dataset().hr_cube.totals("count", the_year, filter_type, by=("Gender",)))
+    return gender.sort_values(ascending=False, kind="stable")
+
+
+@figure_template(sample=lambda: gender_counts("All Years", "Until"), data_keys=("labels", "values"))
+def gender_chart(gender, chart_theme):
     fig = px.pie(names=gender.index,
                  values=gender,
                  color_discrete_sequence=["#42C2FF", "#A1EEBD"],
@@ -279,10 +2255,20 @@ def create_gender_chart(the_year, filter_type, chart_theme):
     return fig
 
 
-def create_emp_department_chart(the_year, filter_type, chart_theme):
-    df_filtered = filter_the_data(the_year, filter_type)
+@cached_figure
+@timed_builder
+def create_gender_chart(the_year, filter_type, chart_theme):
+    gender = gender_counts(the_year, filter_type)
+    return gender_chart.figure(chart_theme, [{"labels": gender.index.tolist(), "values": gender.to_numpy()}])
+
+
+def emp_department_counts(the_year, filter_type):
+    emp_dep = not_empty(current_dataset().hr_cube.totals("count", the_year, filter_type, by=("Department",)))
+    return emp_dep.sort_values(ascending=False, kind="stable")[::-1]
+
 
-    emp_dep = df_filtered["Department"].value_counts()[::-1]
+@figure_template(sample=lambda: emp_department_counts("All Years", "Until"))
+def emp_department_chart(emp_dep, chart_theme):
     fig = px.bar(data_frame=emp_dep,
                  orientation="h",
                  x=emp_dep,
@@ -308,11 +2294,20 @@ def create_emp_department_chart(the_year, filter_type, chart_theme):
     return fig
 
 
-def create_emp_education_chart(the_year, filter_type, chart_theme):
-    df_filtered = filter_the_data(the_year, filter_type)
+@cached_figure
+@timed_builder
+def create_emp_department_chart(the_year, filter_type, chart_theme):
+    emp_dep = emp_department_counts(the_year, filter_type)
+    return emp_department_chart.figure(chart_theme, [{"x": emp_dep.to_numpy(), "y": emp_dep.index.tolist()}])
+
+
+def emp_education_counts(the_year, filter_type):
+    emp_education = not_empty(current_dataset().hr_cube.totals("count", the_year, filter_type, by=("Education",)))
+    return emp_education.sort_values(ascending=False, kind="stable")
 
-    emp_education = df_filtered["Education"].value_counts()
 
+@figure_template(sample=lambda: emp_education_counts("All Years", "Until"))
+def emp_education_chart(emp_education, chart_theme):
     fig = px.bar(x=emp_education.index,
                  y=emp_education,
                  color=emp_education.index,
@@ -339,15 +2334,23 @@ def create_emp_education_chart(the_year, filter_type, chart_theme):
     return fig
 
 
-# ====================== Departments Page ================================
-def create_gender_department_chart(the_year, filter_type, chart_theme):
-    df_filtered = filter_the_data(the_year, filter_type)
+@cached_figure
+@timed_builder
+def create_emp_education_chart(the_year, filter_type, chart_theme):
+    emp_education = emp_education_counts(the_year, filter_type)
+    return emp_education_chart.figure(chart_theme, category_traces(emp_education, used_color))
+
 
-    gender_dep = df_filtered.pivot_table(index="Department", columns="Gender", values="Employee",
-                                         aggfunc="count").fillna(0)
+# ====================== Departments Page ================================
+def gender_department_counts(the_year, filter_type):
+    gender_dep = current_dataset().hr_cube.totals("count", the_year, filter_type, by=("Department", "Gender"))
+    gender_dep = gender_dep[gender_dep.sum(axis=1) > 0]
     gender_dep = gender_dep.sort_values("Male", ascending=False)
-    gender_dep = gender_dep.iloc[:, [1, 0]][::-1]
+    return gender_dep.iloc[:, [1, 0]][::-1]
+
 
+@figure_template(sample=lambda: gender_department_counts("All Years", "Until"))
+def gender_department_chart(gender_dep, chart_theme):
     fig = px.bar(gender_dep,
                  orientation="h",
                  title="Popularity of Gender Via Department",
@@ -371,10 +2374,23 @@ def create_gender_department_chart(the_year, filter_type, chart_theme):
     return fig
 
 
-def create_salary_department_chart(the_year, filter_type, chart_theme):
-    df_filtered = filter_the_data(the_year, filter_type)
-    salary_dep = df_filtered.groupby("Department")["Salary"].mean().sort_values(ascending=False)
+@cached_figure
+@timed_builder
+def create_gender_department_chart(the_year, filter_type, chart_theme):
+    gender_dep = gender_department_counts(the_year, filter_type)
+    traces = column_traces(gender_dep, ["#5FBDFF", "#4FD3C4"], key_axis="y", value_axis="x")
+    return gender_department_chart.figure(chart_theme, traces)
 
+
+def salary_department_means(the_year, filter_type):
+    hr_cube = current_dataset().hr_cube
+    dep_count = not_empty(hr_cube.totals("count", the_year, filter_type, by=("Department",)))
+    salary_dep = hr_cube.totals("salary", the_year, filter_type, by=("Department",))[dep_count.index] / dep_count
+    return salary_dep.sort_values(ascending=False)
+
+
+@figure_template(sample=lambda: salary_department_means("All Years", "Until"))
+def salary_department_chart(salary_dep, chart_theme):
     fig = px.bar(data_frame=salary_dep,
                  orientation="h",
                  y=salary_dep.index,
@@ -402,12 +2418,22 @@ def create_salary_department_chart(the_year, filter_type, chart_theme):
     return fig
 
 
-def create_dep_education_level(the_year, filter_type, chart_theme):
-    df_filtered = filter_the_data(the_year, filter_type)
+@cached_figure
+@timed_builder
+def create_salary_department_chart(the_year, filter_type, chart_theme):
+    salary_dep = salary_department_means(the_year, filter_type)
+    traces = category_traces(salary_dep, ["#5FBDFF"], key_axis="y", value_axis="x")
+    # px keeps the bars in data order, listed bottom-up on a horizontal chart
+    yaxis = {"categoryarray": salary_dep.index[::-1].tolist()}
+    return salary_department_chart.figure(chart_theme, traces, yaxis=yaxis)
+
+
+def dep_education_counts(the_year, filter_type):
+    return not_empty(current_dataset().hr_cube.totals("count", the_year, filter_type, by=("Department", "Education")))
+
 
-    edu_via_dep = df.pivot_table(index="Department",
-                                 columns="Education",
-                                 values="Employee", aggfunc="count").fillna(0)
+@figure_template(sample=lambda: dep_education_counts("All Years", "Until"))
+def dep_education_chart(edu_via_dep, chart_theme):
     fig = px.scatter(edu_via_dep,
                      title="Employees Education Through Departments",
                      template=chart_theme,
@@ -425,14 +2451,34 @@ def create_dep_education_level(the_year, filter_type, chart_theme):
     return fig
 
 
-def employees_table(the_year, filter_type, chart_theme):
-    df_filtered = filter_the_data(the_year, filter_type)
-    df_filtered = df_filtered[["Employee", "Gender", "Education", "City", "Performance_Review", "Salary"]].copy()
+@cached_figure
+@timed_builder
+def create_dep_education_level(the_year, filter_type, chart_theme):
+    edu_via_dep = dep_education_counts(the_year, filter_type)
+    # Without a color sequence px cycles through the theme's colorway
+    colorway = pio.templates[chart_theme].layout.colorway
+    traces = column_traces(edu_via_dep, colorway, offsetgroup=False)
+    return dep_education_chart.figure(chart_theme, traces)
+
+
+@timed_builder
+def employees_table_page(the_year, filter_type, the_dep, page_current, page_size, sort_by, filter_query):
+    ds = current_dataset()
+    # The same rows the export links download
+    positions = employee_positions(ds, the_year, filter_type, the_dep, filter_query, sort_by)
+    if isinstance(positions, slice):
+        positions = np.arange(positions.start, positions.stop)
+
+    page_count = max(math.ceil(len(positions) / page_size), 1)
+    page_current = min(page_current, page_count - 1)
+    start = page_current * page_size
+    return ds.employees_store.records(positions[start:start + page_size]), page_count, page_current
 
-    df_filtered["Salary"] = df_filtered["Salary"].apply(lambda x: f"{x:,.0f}")
-    df_filtered["Performance_Review"] = df_filtered["Performance_Review"].apply(lambda x: f"{x}")
-    df_filtered.rename(columns={"Performance_Review":"Performance"}, inplace=True)
 
+employees_table_id = {"type": "employees-table", "index": "employees"}
+
+
+def get_table_styles(chart_theme):
     if chart_theme == "plotly_dark":
         header_style = {
             'backgroundColor': '#1e1e1e',
@@ -459,24 +2505,36 @@ def employees_table(the_year, filter_type, chart_theme):
             "font": "400 16px arial"
         }
 
+    return header_style, data_style
+
+
+def employees_table(chart_theme):
+    header_style, data_style = get_table_styles(chart_theme)
+
+    # Rows are paged, sorted and filtered on the server by `update_employees_table`
     table = dash_table.DataTable(
-        id='datatable-interactivity',
+        id=employees_table_id,
         columns=[
-            {"name": i, "id": i, "deletable": True, "selectable": True} for i in df_filtered.columns
+            {"name": i, "id": i, "deletable": True, "selectable": True, "type": "numeric",
+             "format": Format(group=Group.yes)} if i in current_dataset().employees_store.numbers
+            else {"name": i, "id": i, "deletable": True, "selectable": True, "type": "text"}
+            for i in table_columns
         ],
         style_header=header_style,
         style_data=data_style,
-        data=df_filtered.to_dict('records'),
+        data=[],
         editable=False,
-        filter_action="native",
-        sort_action="native",
+        filter_action="custom",
+        filter_query="",
+        sort_action="custom",
         sort_mode="multi",
+        sort_by=[],
         column_selectable="single",
         row_selectable="multi",
         row_deletable=False,
         selected_columns=[],
         selected_rows=[],
-        page_action="native",
+        page_action="custom",
         page_current=0,
         page_size=10,
     )
@@ -484,24 +2542,17 @@ def employees_table(the_year, filter_type, chart_theme):
 
 
 # ====================== Locations =====================
-def filter_the_data_by_dep(the_dep):
-    df_filtered = ""
-    if the_dep == "All Departments":
-        df_filtered = df.copy()
-    else:
-        dep_filt = (df["Department"] == the_dep)
-        df_filtered = df[dep_filt].copy()
+def location_counts(the_dep):
+    counts = not_empty(current_dataset().location_cube.totals("count", "All Years", "Until", the_dep, by=("City_Key",)))
+    counts = counts.drop(index=-1, errors="ignore").astype(int)
 
-    return df_filtered
+    locs_emp = geo.iloc[counts.index].rename(columns={"name": "City"})
+    return locs_emp.assign(Employee=counts.to_numpy()).sort_values("City")
 
 
-def create_location_map_chart(the_dep, chart_theme):
-    df_filtered = filter_the_data_by_dep(the_dep)
-    loc = pd.read_csv("https://raw.githubusercontent.com/jasperdebie/VisInfo/master/us-state-capitals.csv")
-    df_filtered = df_filtered.merge(loc, left_on="City", right_on="name")
-    locs_emp = df_filtered.groupby(["City", "latitude", "longitude"],
-                                   as_index=False)["Employee"].count()
-
+@figure_template(sample=lambda: location_counts("All Departments"),
+                 data_keys=("customdata", "hovertext", "lat", "lon"))
+def location_map_chart(locs_emp, chart_theme):
     fig = px.scatter_mapbox(locs_emp,
                             lat="latitude",
                             lon="longitude",
@@ -534,50 +2585,140 @@ def create_location_map_chart(the_dep, chart_theme):
     return fig
 
 
-# ===================== Performance =====================
-def filter_data_dep_date(the_year, filter_type, the_dep):
-    df_filtered = ""
-    if the_year == "All Years":
-        df_filtered = df.copy()
-    else:
-        if filter_type == "In":
-            year_filt = (df["Hire_Date"].dt.year == the_year)
-        else:
-            year_filt = (df["Hire_Date"].dt.year <= the_year)
-        df_filtered = df[year_filt].copy()
+def bin_locations(locs_emp, max_markers):
+    """Merges nearby locations into at most `max_markers` bubbles.
+
+    Locations are snapped to a latitude/longitude grid that is coarsened until few
+    enough cells are left; every bin sits at the employee-weighted centre of its
+    locations and is named after the biggest one.
+    """
+    if not max_markers or len(locs_emp) <= max_markers:
+        return locs_emp
+
+    cell = 0.25
+    while True:
+        cells = pd.MultiIndex.from_arrays([(locs_emp["latitude"] // cell).to_numpy(),
+                                           (locs_emp["longitude"] // cell).to_numpy()])
+        bins = cells.factorize()[0]
+        if bins.max() < max_markers:
+            break
+        cell *= 2
+
+    employees = locs_emp["Employee"].to_numpy()
+    binned = pd.DataFrame({
+        "Employee": np.bincount(bins, weights=employees),
+        "latitude": np.bincount(bins, weights=employees * locs_emp["latitude"].to_numpy()),
+        "longitude": np.bincount(bins, weights=employees * locs_emp["longitude"].to_numpy()),
+        "locations": np.bincount(bins),
+    })
+    binned[["latitude", "longitude"]] = binned[["latitude", "longitude"]].div(binned["Employee"], axis=0)
+    biggest = locs_emp.assign(bin=bins).sort_values("Employee", ascending=False).drop_duplicates("bin")
+    names = biggest.set_index("bin")["City"].sort_index().to_numpy()
+    binned["City"] = [name if count == 1 else f"{name} and {count - 1} more"
+                      for name, count in zip(names, binned["locations"])]
+    binned["Employee"] = binned["Employee"].astype(int)
+    return binned.sort_values("City")
+
+
+@cached_figure
+@timed_builder
+def create_marker_map_chart(the_dep, chart_theme):
+    locs_emp = bin_locations(location_counts(the_dep), LOCATION_MAP_MAX_MARKERS)
+    employees = locs_emp["Employee"].to_numpy()
+    lat = locs_emp["latitude"].to_numpy()
+    lon = locs_emp["longitude"].to_numpy()
+
+    trace = {
+        "customdata": employees[:, None],
+        "hovertext": locs_emp["City"].tolist(),
+        "lat": lat,
+        "lon": lon,
+        # px scales the bubble areas so the largest one is 20px across
+        "marker": {"color": employees, "size": employees, "sizeref": employees.max() / 20 ** 2},
+    }
+    center = {"lat": lat.mean(), "lon": lon.mean()}
+    return location_map_chart.figure(chart_theme, [trace], mapbox={"center": center})
+
+
+def state_counts(the_dep):
+    """Employees per state of a department, as a column of the dataset's `state_matrix`."""
+    states = current_dataset().state_matrix
+    counts = states[the_dep] if the_dep in states.columns else pd.Series(0, index=states.index)
+    counts = counts[counts > 0]
+    names = geo.set_index("code").loc[counts.index, "name"]
+    return pd.DataFrame({"State": names.to_numpy(), "Employee": counts.to_numpy()}, index=counts.index)
+
+
+@figure_template(sample=lambda: state_counts("All Departments").reset_index(names="Code"),
+                 data_keys=("customdata", "hovertext", "locations", "z"))
+def state_map_chart(states_emp, chart_theme):
+    fig = px.choropleth(states_emp,
+                        locations="Code",
+                        locationmode="USA-states",
+                        scope="usa",
+                        hover_name="State",
+                        hover_data=["Employee"],
+                        color="Employee",
+                        color_continuous_scale=px.colors.cyclical.IceFire,
+                        height=650,
+                        title="\t\tEmployees Through Locations",
+                        template=chart_theme
+                        )
 
-    if the_dep == "All Departments":
-        df_filtered = df_filtered.copy()
-    else:
-        dep_filt = (df_filtered["Department"] == the_dep)
-        df_filtered = df_filtered[dep_filt].copy()
+    fig.update_layout(
+        title={
+            "font": {
+                "size": 32,
+                "family": "tahoma"
+            }
+        },
+        hoverlabel={
+            "bgcolor": "#222",
+            "font_size": 15,
+            "font_family": "tahoma"
+        }
+    )
 
-    return df_filtered
+    return fig
 
 
-def create_performance_cards(the_year, filter_type, the_dep):
-    df_filtered = filter_data_dep_date(the_year, filter_type, the_dep)
+@cached_figure
+@timed_builder
+def create_state_map_chart(the_dep, chart_theme):
+    states_emp = state_counts(the_dep)
+    employees = states_emp["Employee"].to_numpy()
 
-    # Performance Review Completion Rate
-    completed_review = df_filtered.loc[df["Performance_Review"] == 10, "Performance_Review"].count()
-    performance_rate = completed_review / len(df_filtered) * 100
+    trace = {
+        "customdata": employees[:, None],
+        "hovertext": states_emp["State"].tolist(),
+        "locations": states_emp.index.tolist(),
+        "z": employees,
+    }
+    return state_map_chart.figure(chart_theme, [trace])
 
-    # Turnover Rate
-    turnover_rate = (len(df_filtered["Termination_Date"]) - df_filtered["Termination_Date"].isna().sum()) / len(
-        df_filtered) * 100
 
-    termination = (~df_filtered["Termination_Date"].isna()).sum()
+def create_location_map_chart(the_dep, chart_theme):
+    """The Locations chart, drawn the way `LOCATION_MAP_MODE` asks for."""
+    if LOCATION_MAP_MODE == "states":
+        return create_state_map_chart(the_dep, chart_theme)
+    return create_marker_map_chart(the_dep, chart_theme)
 
-    promotions = (~df_filtered["Last_Promotion_Date"].isna()).sum()
 
-    return f"{performance_rate:0.2f}%", f"{turnover_rate:0.2f}%", termination, promotions
+# ===================== Performance =====================
+@timed_builder
+def create_performance_cards(the_year, filter_type, the_dep):
+    return compute_kpis(the_year, filter_type, the_dep).performance_cards()
 
 
-def create_performance_department_chart(the_year, filter_type, the_dep, chart_theme):
-    df_filtered = filter_data_dep_date(the_year, filter_type, the_dep)
+def performance_department_means(the_year, filter_type, the_dep):
+    hr_cube = current_dataset().hr_cube
+    dep_count = not_empty(hr_cube.totals("count", the_year, filter_type, the_dep, by=("Department",)))
+    performance_dep = hr_cube.totals("review", the_year, filter_type, the_dep, by=("Department",))[dep_count.index]
+    return (performance_dep / dep_count).sort_values(ascending=False)
 
-    performance_dep = df_filtered.groupby("Department")["Performance_Review"].mean().sort_values(ascending=False)
 
+@figure_template(sample=lambda: performance_department_means("All Years", "Until", "All Departments"))
+def performance_department_chart(performance_dep, chart_theme):
     fig = px.bar(data_frame=performance_dep,
                  x=performance_dep.index,
                  y=performance_dep,
@@ -604,221 +2745,626 @@ def create_performance_department_chart(the_year, filter_type, the_dep, chart_th
     return fig
 
 
-# CallBack Functions
-@app.callback(
-    Output(component_id="year-filter", component_property="style"),
-    Output(component_id="filter-type", component_property="style"),
+@cached_figure
+@timed_builder
+def create_performance_department_chart(the_year, filter_type, the_dep, chart_theme):
+    performance_dep = performance_department_means(the_year, filter_type, the_dep)
+    traces = category_traces(performance_dep, used_color)
+    xaxis = {"categoryarray": performance_dep.index.tolist()}
+    return performance_department_chart.figure(chart_theme, traces, xaxis=xaxis)
 
-    Output(component_id="department-filter", component_property="style"),
-    Output(component_id="department-filter", component_property="options"),
 
-    Output(component_id="page-content", component_property="children"),
-    Output(component_id="page-content", component_property="style"),
+# ====================== Trends =====================
+def headcount_series(the_dep):
+    return current_dataset().headcount_series.series(the_dep)
 
-    Input(component_id="page-url", component_property="pathname"),
-    Input(component_id="year-filter", component_property="value"),
-    Input(component_id="filter-type", component_property="value"),
-    Input(component_id="department-filter", component_property="value"),
-    # Input(component_id="theme-toggle", component_property="n_clicks"),
-    Input(component_id="theme-toggle", component_property="value"),
 
-)
-def get_content_layout(pathname, year_value, filter_type, dep_value, target_theme):
-    app_theme = ""
-    chart_theme = ""
-    chart_border = ""
-    card_bg = ""
-    card_bg_border = ""
-    card_font_color = ""
-
-    if year_value != "All Years":
-        if filter_type == "Until":
-            year_filt = (df["Hire_Date"].dt.year <= year_value)
-        else:
-            year_filt = (df["Hire_Date"].dt.year == year_value)
+@figure_template(sample=lambda: headcount_series("All Departments"))
+def headcount_chart(series, chart_theme):
+    fig = px.area(series,
+                  x=series.index,
+                  y="Headcount",
+                  color_discrete_sequence=["#5FBDFF"],
+                  template=chart_theme,
+                  labels={"x": "Month"},
+                  title="Headcount at the End of Each Month"
+                  )
 
-        departments = df.loc[year_filt, "Department"].unique().tolist()
-        departments.insert(0, "All Departments")
-    else:
-        departments = df.loc[:, "Department"].unique().tolist()
-        departments.insert(0, "All Departments")
+    custome_chart_layout(fig)
 
-    if target_theme == "Dark":
-        app_theme = "#111"
-        chart_theme = "plotly_dark"
-        chart_border = "#222"
+    fig.update_traces(
+        hovertemplate="Month: %{x|%b %Y}<br>Headcount: %{y}",
+        line=dict(width=3)
+    )
+    return fig
 
-        card_bg = "#000"
-        card_bg_border = "#00D7FF"
-        card_font_color = "#fafafa"
 
-    else:
-        app_theme = "#fafafa"
-        chart_theme = "plotly_white"
-        chart_border = "#fafafa"
+@cached_figure
+@timed_builder
+def create_headcount_chart(the_dep, chart_theme):
+    series = headcount_series(the_dep)
+    return headcount_chart.figure(chart_theme, [{"x": series.index.tolist(), "y": series["Headcount"].to_numpy()}])
 
-        card_bg = "#fff"
-        card_bg_border = "#fafafa"
-        card_font_color = "#555"
 
-    card_style = {
-        "background-color": card_bg,
-        "text-align": "center",
-        "padding-top": "25px",
-        "padding-bottom": "25px",
-        "border": f"2px solid {card_bg_border}",
-        "border-radius": "5px",
-        "margin-bottom": "5px",
-        "box-shadow": "0 1px 2px 0 rgba(0, 0, 0, 0.05)"
-    }
-    graph_style = {
-        "margin-bottom": "10px",
-        "height": "560px",
-        "border": f"3px solid {chart_border}",
-        "border-radius": "4px"
-    }
+@figure_template(sample=lambda: headcount_series("All Departments")[["Hires", "Terminations"]])
+def movements_chart(movements, chart_theme):
+    fig = px.bar(movements,
+                 x=movements.index,
+                 y=["Hires", "Terminations"],
+                 barmode="group",
+                 color_discrete_sequence=used_color,
+                 template=chart_theme,
+                 labels={"x": "Month", "value": "Employees", "variable": ""},
+                 title="Hires and Terminations per Month"
+                 )
 
-    the_app_theme = {
-        "margin-left": "15rem",
-        "margin-right": "0rem",
-        "padding": "20px",
-        "height": "100%",
-        "background-color": app_theme
-    }
-    if pathname == "/":
-        return [
-            filter_style,
-            {"display": "block"},
-            {"display": "none"},
-            [{"label": html.Span([i], style={'color': '#6499E9', 'font': "bold 16px arial", "margin": "12px 5px"}),
-              "value": i, } for i in departments],
+    custome_chart_layout(fig, title_size=24, showlegend=True)
 
-            html.Div([
-                html.Br(),
-                dbc.Row([
-                    html.H1("HR Analysis", style={"font": "bold 40px arial", "text-align": "center"})
-                ]),
+    # The trace name (Hires or Terminations) is shown next to the label
+    fig.update_traces(
+        hovertemplate="Month: %{x|%b %Y}<br>Employees: %{y}",
+    )
+    return fig
 
-                html.Br(),
-
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Card(
-                            dbc.CardBody([
-                                html.H3(create_home_cards(year_value, filter_type)[0],
-                                        style={"color": card_font_color, "font": "bold 32px tahoma"},
-                                        id='emp-count-crd'),
-                                html.H3("Employees", style={"font": "bold 20px tahoma"}),
-                            ]), style=card_style,
-                        ),
-
-                    ]),
-                    dbc.Col([
-                        dbc.Card(
-                            dbc.CardBody([
-                                html.H3(create_home_cards(year_value, filter_type)[1],
-                                        style={"color": card_font_color, "font": "bold 32px tahoma"},
-                                        id='available-pos-crd'),
-                                html.H3("Available Positions", style={"font": "bold 20px tahoma"}),
-                            ]), style=card_style
-                        ),
-
-                    ]),
-                    dbc.Col([
-                        dbc.Card(
-                            dbc.CardBody([
-                                html.H3(create_home_cards(year_value, filter_type)[2],
-                                        style={"color": card_font_color, "font": "bold 32px tahoma"},
-                                        id='salary-job-crd'),
-                                html.H3("Average Salary", style={"font": "bold 20px tahoma"}),
-                            ]), style=card_style
-                        ),
-                    ]),
-                ]),
-                html.Br(),
-
-                dbc.Row(
-                    [
-                        dbc.Col(
-                            [
-                                dcc.Graph(id="gender-chart",
-                                          figure=create_gender_chart(year_value, filter_type, chart_theme),
-                                          style=graph_style)
-                            ]
-                        ),
-                        dbc.Col(
-                            [
-                                dcc.Graph(id="emp-department-chart",
-                                          figure=create_emp_department_chart(year_value, filter_type, chart_theme),
-                                          style=graph_style)
-                            ]
-                        )
-                    ]
-                ),
 
-                html.Br(),
-                dbc.Row([
-                    dbc.Col(
-                        [
-                            dcc.Graph(id="emp_education_chart",
-                                      figure=create_emp_education_chart(year_value, filter_type, chart_theme),
-                                      style=graph_style)
-                        ]
-                    )
-                ])
+@cached_figure
+@timed_builder
+def create_movements_chart(the_dep, chart_theme):
+    movements = headcount_series(the_dep)[["Hires", "Terminations"]]
+    return movements_chart.figure(chart_theme, column_traces(movements, used_color))
 
-            ]),
 
-            # App Theme Dark Or Light
-            the_app_theme
-        ]
+@figure_template(sample=lambda: headcount_series("All Departments"))
+def turnover_chart(series, chart_theme):
+    fig = px.line(series,
+                  x=series.index,
+                  y="Turnover",
+                  color_discrete_sequence=["#FF6969"],
+                  template=chart_theme,
+                  labels={"x": "Month", "Turnover": "Turnover Rate (%)"},
+                  title="Turnover Rate over the Last 12 Months"
+                  )
 
-    if pathname == "/Departments":
-        return [
-            filter_style,
-            {"display": "block"},
-            {"display": "none"},
-            [{"label": html.Span([i], style={'color': '#6499E9', 'font': "bold 16px arial", "margin": "12px 5px"}),
-              "value": i, } for i in departments],
+    custome_chart_layout(fig, title_size=24)
+
+    fig.update_traces(
+        hovertemplate="Month: %{x|%b %Y}<br>Turnover: %{y:.1f}%",
+        line=dict(width=3)
+    )
+    return fig
+
+
+@cached_figure
+@timed_builder
+def create_turnover_chart(the_dep, chart_theme):
+    series = headcount_series(the_dep)
+    return turnover_chart.figure(chart_theme, [{"x": series.index.tolist(), "y": series["Turnover"].to_numpy()}])
+
+
+# ====================== Cohorts =====================
+def cohort_retention(the_dep, the_reason):
+    retention = current_dataset().cohort_matrix.retention(the_dep, the_reason)
+    # Labels rather than numbers, so every cohort and tenure year gets its own row and column
+    retention.index = retention.index.astype(str)
+    retention.columns = [f"{years} yr" for years in retention.columns]
+    return retention
+
+
+@figure_template(sample=lambda: cohort_retention("All Departments", "All Reasons"), data_keys=("x", "y", "z"))
+def cohort_heatmap_chart(retention, chart_theme):
+    fig = px.imshow(retention,
+                    text_auto=".0f",
+                    aspect="auto",
+                    color_continuous_scale="Blues",
+                    zmin=0,
+                    zmax=100,
+                    template=chart_theme,
+                    labels={"x": "Years Since Hire", "y": "Hire Year", "color": "Retained (%)"},
+                    title="Employees Retained by Hire-Year Cohort (%)"
+                    )
+
+    custome_chart_layout(fig, title_size=24)
+
+    fig.update_traces(
+        hovertemplate="Hired in %{y}<br>After %{x}: %{z:.1f}% retained<extra></extra>",
+    )
+    return fig
+
+
+@cached_figure
+@timed_builder
+def create_cohort_heatmap_chart(the_dep, the_reason, chart_theme):
+    retention = cohort_retention(the_dep, the_reason)
+    trace = {"x": retention.columns.tolist(), "y": retention.index.tolist(), "z": retention.to_numpy()}
+    return cohort_heatmap_chart.figure(chart_theme, [trace])
+
+
+def cohort_survival(the_dep, the_reason):
+    """Retention curves starting at 100% on the hire date, one column per cohort."""
+    retention = current_dataset().cohort_matrix.retention(the_dep, the_reason)
+    curves = pd.concat([pd.DataFrame(100.0, index=retention.index, columns=[0]), retention], axis=1).T
+    curves.columns = curves.columns.astype(str)
+    return curves.rename_axis(index="Years", columns="Cohort")
+
+
+@figure_template(sample=lambda: cohort_survival("All Departments", "All Reasons"))
+def survival_chart(curves, chart_theme):
+    fig = px.line(curves,
+                  x=curves.index,
+                  y=curves.columns,
+                  markers=True,
+                  template=chart_theme,
+                  labels={"x": "Years Since Hire", "value": "Retained (%)", "Cohort": "Hire Year"},
+                  title="Retention Curves by Hire Year"
+                  )
+
+    custome_chart_layout(fig, title_size=24, showlegend=True)
+
+    # The trace name (the hire year) is shown next to the label
+    fig.update_traces(
+        hovertemplate="After %{x} years: %{y:.1f}% retained",
+    )
+    return fig
+
+
+@cached_figure
+@timed_builder
+def create_survival_chart(the_dep, the_reason, chart_theme):
+    curves = cohort_survival(the_dep, the_reason)
+    colorway = pio.templates[chart_theme].layout.colorway
+    # Years a cohort has not been observed for are gaps (NaN), so each curve stops at its last one
+    traces = [
+        {"x": curves.index.tolist(), "y": curves[cohort].to_numpy(), "name": cohort, "legendgroup": cohort,
+         "line": {"color": colorway[i % len(colorway)]}}
+        for i, cohort in enumerate(curves.columns)
+    ]
+    return survival_chart.figure(chart_theme, traces)
+
+
+# ====================== Workforce =====================
+def band_filters(age_band, tenure_band, promotion_band):
+    """The Workforce band dropdowns as a `HRCube.totals` where-filter, "All" filtering nothing."""
+    bands = {"Age_Band": age_band, "Tenure_Band": tenure_band, "Promotion_Band": promotion_band}
+    return {dim: label for dim, label in bands.items() if label != "All"}
+
+
+def workforce_totals(measure, the_year, filter_type, the_dep, breakdown, where):
+    attribute_cube = current_dataset().attribute_cube
+    return attribute_cube.totals(measure, the_year, filter_type, the_dep, by=(breakdown,), where=where)
+
+
+def workforce_counts(the_year, filter_type, the_dep, breakdown, where):
+    # Empty bands are kept, so the bars always follow the band order
+    return workforce_totals("count", the_year, filter_type, the_dep, breakdown, where)
+
+
+def workforce_means(measure, the_year, filter_type, the_dep, breakdown, where):
+    counts = not_empty(workforce_totals("count", the_year, filter_type, the_dep, breakdown, where))
+    return workforce_totals(measure, the_year, filter_type, the_dep, breakdown, where)[counts.index] / counts
+
+
+def workforce_figure(chart, values, chart_theme, breakdown, title, value_label, value_format):
+    """One of the Workforce bar charts for `values` by `breakdown` band."""
+    band_label = attribute_dims[breakdown]
+    traces = category_traces(values, used_color)
+    for trace in traces:
+        trace["hovertemplate"] = f"{band_label}: %{{x}}<br>{value_label}: %{{y:{value_format}}}<extra></extra>"
+    return chart.figure(chart_theme, traces,
+                        title={"text": f"{title} by {band_label}"},
+                        xaxis={"title": {"text": band_label}, "categoryarray": values.index.tolist()},
+                        legend={"title": {"text": band_label}})
+
+
+def workforce_bar_chart(values, chart_theme, title, value_label, text_auto):
+    fig = px.bar(data_frame=values,
+                 x=values.index,
+                 y=values,
+                 color=values.index,
+                 color_discrete_sequence=used_color,
+                 template=chart_theme,
+                 text_auto=text_auto,
+                 labels={"y": value_label},
+                 title=title
+                 )
+
+    custome_chart_layout(fig)
+
+    fig.update_traces(
+        textfont={
+            "size": 14,
+            "family": "tahoma",
+            "color": "#000"
+        },
+        marker=dict(line=dict(color='#222', width=1))
+    )
+    return fig
+
+
+@figure_template(sample=lambda: workforce_counts("All Years", "Until", "All Departments", "Age_Band", {}))
+def workforce_count_chart(counts, chart_theme):
+    return workforce_bar_chart(counts, chart_theme, "Employees by Age Band", "Employees Count", True)
+
+
+@cached_figure
+@timed_builder
+def create_workforce_count_chart(the_year, filter_type, the_dep, breakdown, age_band, tenure_band, promotion_band,
+                                 chart_theme):
+    counts = workforce_counts(the_year, filter_type, the_dep, breakdown,
+                              band_filters(age_band, tenure_band, promotion_band))
+    return workforce_figure(workforce_count_chart, counts, chart_theme, breakdown, "Employees", "Employees", "d")
+
+
+@figure_template(sample=lambda: workforce_means("salary", "All Years", "Until", "All Departments", "Age_Band", {}))
+def workforce_salary_chart(salaries, chart_theme):
+    return workforce_bar_chart(salaries, chart_theme, "Average Salary by Age Band", "Average Salary", "0.3s")
 
-            html.Div([
-                html.Br(),
-                dbc.Row([
-                    html.H1("Departments", style={"font": "bold 40px arial", "text-align": "center"})
+
+@cached_figure
+@timed_builder
+def create_workforce_salary_chart(the_year, filter_type, the_dep, breakdown, age_band, tenure_band, promotion_band,
+                                  chart_theme):
+    salaries = workforce_means("salary", the_year, filter_type, the_dep, breakdown,
+                               band_filters(age_band, tenure_band, promotion_band))
+    return workforce_figure(workforce_salary_chart, salaries, chart_theme, breakdown,
+                            "Average Salary", "Average Salary", "0.3s")
+
+
+@figure_template(sample=lambda: workforce_means("review", "All Years", "Until", "All Departments", "Age_Band", {}))
+def workforce_performance_chart(reviews, chart_theme):
+    return workforce_bar_chart(reviews, chart_theme, "Average Performance by Age Band", "Average Performance", "0.2s")
+
+
+@cached_figure
+@timed_builder
+def create_workforce_performance_chart(the_year, filter_type, the_dep, breakdown, age_band, tenure_band,
+                                       promotion_band, chart_theme):
+    reviews = workforce_means("review", the_year, filter_type, the_dep, breakdown,
+                              band_filters(age_band, tenure_band, promotion_band))
+    return workforce_figure(workforce_performance_chart, reviews, chart_theme, breakdown,
+                            "Average Performance", "Average Performance", "0.2f")
+
+
+# ---------------------- Page Layouts ----------------------
+def get_chart_theme(target_theme):
+    return "plotly_dark" if target_theme == "Dark" else "plotly_white"
+
+
+def get_theme_styles(target_theme):
+    """Returns the chart template and the page, card, graph and table styles of a theme."""
+    if target_theme == "Dark":
+        app_theme = "#111"
+        chart_theme = "plotly_dark"
+        chart_border = "#222"
+
+        card_bg = "#000"
+        card_bg_border = "#00D7FF"
+        card_font_color = "#fafafa"
+
+    else:
+        app_theme = "#fafafa"
+        chart_theme = "plotly_white"
+        chart_border = "#fafafa"
+
+        card_bg = "#fff"
+        card_bg_border = "#fafafa"
+        card_font_color = "#555"
+
+    card_style = {
+        "background-color": card_bg,
+        "text-align": "center",
+        "padding-top": "25px",
+        "padding-bottom": "25px",
+        "border": f"2px solid {card_bg_border}",
+        "border-radius": "5px",
+        "margin-bottom": "5px",
+        "box-shadow": "0 1px 2px 0 rgba(0, 0, 0, 0.05)"
+    }
+    graph_style = {
+        "margin-bottom": "10px",
+        "height": "560px",
+        "border": f"3px solid {chart_border}",
+        "border-radius": "4px"
+    }
+
+    the_app_theme = {
+        "margin-left": "15rem",
+        "margin-right": "0rem",
+        "padding": "20px",
+        "height": "100%",
+        "background-color": app_theme
+    }
+    header_style, data_style = get_table_styles(chart_theme)
+
+    return {
+        "chart_theme": chart_theme,
+        "page": the_app_theme,
+        "card": card_style,
+        "card_value": {"color": card_font_color, "font": "bold 32px tahoma"},
+        "graph": graph_style,
+        "table_header": header_style,
+        "table_data": data_style,
+    }
+
+
+# Sent once with the app layout, so switching the theme restyles the page in the browser (assets/theme.js)
+theme_styles_store.data = {
+    theme: {**get_theme_styles(theme), "template": get_chart_theme(theme)}
+    for theme in ("Light", "Dark")
+}
+
+
+def page_title(title):
+    return dbc.Row([
+        html.H1(title, style={"font": "bold 40px arial", "text-align": "center"})
+    ])
+
+
+# Themed components get pattern-matching ids, so `switch_theme` can restyle all of them at once
+def kpi_card_id(card_id):
+    return {"type": "kpi-value", "index": card_id}
+
+
+def chart_graph_id(graph_id):
+    return {"type": "chart-graph", "index": graph_id}
+
+
+def kpi_card(card_id, card_title, styles, title_size=20):
+    # The value is filled in by the page's cards callback
+    return dbc.Col([
+        dbc.Card(
+            dbc.CardBody([
+                html.H3(style=styles["card_value"], id=kpi_card_id(card_id)),
+                html.H3(card_title, style={"font": f"bold {title_size}px tahoma"}),
+            ]), style=styles["card"], id={"type": "kpi-card", "index": card_id},
+        ),
+    ])
+
+
+def progress_bar(progress_id):
+    # Only shown while a background callback is running, see `background_options`
+    return dbc.Progress(id=progress_id, value=100, label="", striped=True, animated=True,
+                        style={"display": "none"}, className="mb-2")
+
+
+def export_buttons():
+    # The links follow the sidebar and the table's filter and sort, see `update_export_links`
+    return html.Div([
+        dbc.Button("Download CSV", id="export-csv", href="", external_link=True, color="primary",
+                   size="sm", className="me-2"),
+        dbc.Button("Download Parquet", id="export-parquet", href="", external_link=True, color="primary",
+                   size="sm", outline=True),
+    ], className="mb-2")
+
+
+def chart_graph(graph_id, styles):
+    # The figure is filled in by the graph's own callback
+    return dbc.Col([
+        dcc.Graph(id=chart_graph_id(graph_id), style=styles["graph"])
+    ])
+
+
+def home_layout(styles):
+    return html.Div([
+        html.Br(),
+        page_title("HR Analysis"),
+
+        html.Br(),
+
+        dbc.Row([
+            kpi_card("emp-count-crd", "Employees", styles),
+            kpi_card("available-pos-crd", "Available Positions", styles),
+            kpi_card("salary-job-crd", "Average Salary", styles),
+        ]),
+        html.Br(),
+
+        dbc.Row([
+            chart_graph("gender-chart", styles),
+            chart_graph("emp-department-chart", styles),
+        ]),
+
+        html.Br(),
+        dbc.Row([
+            chart_graph("emp_education_chart", styles),
+        ])
+    ])
+
+
+def departments_layout(styles):
+    return html.Div([
+        html.Br(),
+        page_title("Departments"),
+
+        html.Br(),
+        dbc.Row([
+            chart_graph("salary-department-chart", styles),
+            chart_graph("gender-department-chart", styles),
+        ]),
+        html.Br(),
+        progress_bar("dep-education-progress"),
+        dbc.Row([
+            chart_graph("dep-education-chart", styles),
+        ])
+    ])
+
+
+def locations_layout(styles):
+    return html.Div([
+        html.Br(),
+        page_title("Locations"),
+
+        html.Br(),
+        progress_bar("locations-progress"),
+        dbc.Row([
+            chart_graph("emp-locations-chart", styles),
+        ]),
+    ])
+
+
+def performance_layout(styles):
+    return html.Div([
+        # Shown instead of the page body when the department has no hires in the chosen years
+        html.Div(id="performance-alert"),
+
+        html.Div([
+            html.Br(),
+            page_title("Performance"),
+            html.Br(),
+
+            dbc.Row([
+                kpi_card("performance-review-crd", "Performance Rate", styles, 18),
+                kpi_card("turnover-crd", "Turnover Rate", styles, 18),
+                kpi_card("termination", "Terminated Employees", styles, 18),
+                kpi_card("promotions", "Promoted Employees", styles, 18),
+            ]),
+            html.Br(),
+
+            dbc.Row([
+                chart_graph("performance-department-chart", styles),
+            ]),
+            html.Br(),
+
+            progress_bar("employees-table-progress"),
+            export_buttons(),
+            dbc.Row([
+                dbc.Col([
+                    employees_table(styles["chart_theme"])
                 ]),
+            ])
+        ], id="performance-body"),
+    ])
+
 
-                html.Br(),
-                dbc.Row(
-                    [
-                        dbc.Col(
-                            [
-                                dcc.Graph(id="salary-department-chart",
-                                          figure=create_salary_department_chart(year_value, filter_type, chart_theme),
-                                          style=graph_style)
-                            ]
-                        ),
-                        dbc.Col(
-                            [
-                                dcc.Graph(id="gender-department-chart",
-                                          figure=create_gender_department_chart(year_value, filter_type, chart_theme),
-                                          style=graph_style)
-                            ]
-                        ),
-                    ]
+def trends_layout(styles):
+    return html.Div([
+        html.Br(),
+        page_title("Headcount & Turnover"),
+
+        html.Br(),
+        dbc.Row([
+            chart_graph("headcount-chart", styles),
+        ]),
+        html.Br(),
+        dbc.Row([
+            chart_graph("movements-chart", styles),
+            chart_graph("turnover-chart", styles),
+        ]),
+    ])
+
+
+def cohorts_layout(styles):
+    return html.Div([
+        html.Br(),
+        page_title("Cohort Retention"),
+
+        html.Br(),
+        # Leavers for the other reasons count as still employed until they left
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id="termination-reason",
+                    options=["All Reasons", *current_dataset().cohort_matrix.reasons],
+                    value="All Reasons",
+                    clearable=False,
+                    style={"width": "320px", "font-family": "arial"},
                 ),
-                html.Br(),
-                dbc.Row([
-                    dbc.Col(
-                        [
-                            dcc.Graph(id="gender-department-chart",
-                                      figure=create_dep_education_level(year_value, filter_type, chart_theme),
-                                      style=graph_style)
-                        ]
-                    ),
-                ])
+            ]),
+        ], className="mb-3"),
+        dbc.Row([
+            chart_graph("cohort-heatmap-chart", styles),
+        ]),
+        html.Br(),
+        dbc.Row([
+            chart_graph("survival-chart", styles),
+        ]),
+    ])
+
+
+def band_dropdown(dropdown_id, bands, all_label):
+    return dcc.Dropdown(
+        id=dropdown_id,
+        options=[{"label": all_label, "value": "All"}, *[{"label": label, "value": label} for label in bands]],
+        value="All",
+        clearable=False,
+        style={"font-family": "arial"},
+    )
+
 
+def workforce_layout(styles):
+    return html.Div([
+        html.Br(),
+        page_title("Workforce Profile"),
+
+        html.Br(),
+        # The bars break down by one band, the other dropdowns keep only the employees of a band
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id="workforce-breakdown",
+                    options=[{"label": f"By {label}", "value": dim} for dim, label in attribute_dims.items()],
+                    value="Age_Band",
+                    clearable=False,
+                    style={"font-family": "arial"},
+                ),
             ]),
+            dbc.Col([band_dropdown("age-band-filter", AGE_BANDS, "All Ages")]),
+            dbc.Col([band_dropdown("tenure-band-filter", TENURE_BANDS, "All Tenures")]),
+            dbc.Col([band_dropdown("promotion-band-filter", PROMOTION_BANDS, "Any Promotion")]),
+        ], className="mb-3"),
+        dbc.Row([
+            chart_graph("workforce-count-chart", styles),
+        ]),
+        html.Br(),
+        dbc.Row([
+            chart_graph("workforce-salary-chart", styles),
+            chart_graph("workforce-performance-chart", styles),
+        ]),
+    ])
+
+
+# CallBack Functions
+@app.callback(
+    Output(component_id="year-filter", component_property="style"),
+    Output(component_id="filter-type", component_property="style"),
+    Output(component_id="department-filter", component_property="style"),
+
+    Output(component_id="page-content", component_property="children"),
+    Output(component_id="page-content", component_property="style"),
+
+    Input(component_id="page-url", component_property="pathname"),
+    # Theme changes restyle the current page in the browser, see `switch_theme`
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback()
+def get_content_layout(pathname, target_theme):
+    content = page_layout(pathname, target_theme)
+    if content is None:
+        raise PreventUpdate
+    return content
+
+
+@cached_figure
+def page_layout(pathname, target_theme):
+    """Sidebar filter styles, page content and page style of a route, or None for an unknown route."""
+    # Only the static page skeleton is built here, every card, graph and table has its own callback
+    styles = get_theme_styles(target_theme)
+    the_app_theme = styles["page"]
 
+    if pathname == "/":
+        return [
+            filter_style,
+            {"display": "block"},
+            {"display": "none"},
+            home_layout(styles),
+            # App Theme Dark Or Light
+            the_app_theme
+        ]
+
+    if pathname == "/Departments":
+        return [
+            filter_style,
+            {"display": "block"},
+            {"display": "none"},
+            departments_layout(styles),
             # App Theme Dark or Light
             the_app_theme
         ]
@@ -828,132 +3374,521 @@ def get_content_layout(pathname, year_value, filter_type, dep_value, target_them
             {"display": "none"},
             {"display": "none"},
             filter_style,
-            [{"label": html.Span([i], style={'color': '#6499E9', 'font': "bold 16px arial", "margin": "12px 5px"}),
-              "value": i, } for i in departments],
-
-            html.Div([
-                html.Br(),
-                dbc.Row([
-                    html.H1("Locations", style={"font": "bold 40px arial", "text-align": "center"})
-                ]),
-
-                html.Br(),
-                dbc.Row(
-                    [
-                        dbc.Col(
-                            [
-                                dcc.Graph(id="emp-locations-chart",
-                                          figure=create_location_map_chart(dep_value, chart_theme),
-                                          style=graph_style)
-                            ]
-                        )
-                    ]
-                ),
-            ]),
+            locations_layout(styles),
             # App Theme Dark Or Light
-            {
-                "margin-left": "15rem",
-                "margin-right": "0rem",
-                "padding": "20px",
-                "height": "100vh",
-                "background-color": app_theme
-            }
+            {**the_app_theme, "height": "100vh"}
         ]
 
     if pathname == "/Performance":
-        if dep_value not in departments:
-            page_content = get_alert(year_value, dep_value)
-        else:
-            page_content = html.Div([
-                html.Br(),
-                dbc.Row([
-                    html.H1("Performance", style={"font": "bold 40px arial", "text-align": "center"})
-                ]),
-                html.Br(),
-
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Card(
-                            dbc.CardBody([
-                                html.H3(create_performance_cards(year_value, filter_type, dep_value)[0],
-                                        style={"color": card_font_color, "font": "bold 32px tahoma"},
-                                        id='performance-review-crd'),
-                                html.H3("Performance Rate", style={"font": "bold 18px tahoma"}),
-                            ]), style=card_style,
-                        ),
-
-                    ]),
-                    dbc.Col([
-                        dbc.Card(
-                            dbc.CardBody([
-                                html.H3(create_performance_cards(year_value, filter_type, dep_value)[1],
-                                        style={"color": card_font_color, "font": "bold 32px tahoma"},
-                                        id='turnover-crd'),
-                                html.H3("Turnover Rate", style={"font": "bold 18px tahoma"}),
-                            ]), style=card_style
-                        ),
-
-                    ]),
-                    dbc.Col([
-                        dbc.Card(
-                            dbc.CardBody([
-                                html.H3(create_performance_cards(year_value, filter_type, dep_value)[2],
-                                        style={"color": card_font_color, "font": "bold 32px tahoma"},
-                                        id='termination'),
-                                html.H3("Terminated Employees", style={"font": "bold 18px tahoma"}),
-                            ]), style=card_style
-                        ),
-                    ]),
-                    dbc.Col([
-                        dbc.Card(
-                            dbc.CardBody([
-                                html.H3(create_performance_cards(year_value, filter_type, dep_value)[3],
-                                        style={"color": card_font_color, "font": "bold 32px tahoma"},
-                                        id='promotions'),
-                                html.H3("Promoted Employees", style={"font": "bold 18px tahoma"}),
-                            ]), style=card_style
-                        ),
-                    ]),
-                ]),
-                html.Br(),
-
-                dbc.Row([
-                    dbc.Col(
-                        [
-                            dcc.Graph(id="gender-department-chart",
-                                      figure=create_performance_department_chart(year_value, filter_type, dep_value,
-                                                                                 chart_theme),
-                                      style=graph_style)
-                        ]
-                    ),
-                ]),
-                html.Br(),
-
-                dbc.Row([
-                    dbc.Col(
-                        [
-                            employees_table(year_value, filter_type, chart_theme)
+        return [
+            filter_style,
+            {"display": "block", "margin-bottom": "25px"},
+            filter_style,
+            performance_layout(styles),
+            the_app_theme
+        ]
 
-                        ]
-                    ),
-                ])
+    if pathname == "/Trends":
+        # The series cover the whole history, only the department filters them
+        return [
+            {"display": "none"},
+            {"display": "none"},
+            filter_style,
+            trends_layout(styles),
+            the_app_theme
+        ]
 
-            ]),
+    if pathname == "/Cohorts":
+        return [
+            {"display": "none"},
+            {"display": "none"},
+            filter_style,
+            cohorts_layout(styles),
+            the_app_theme
+        ]
 
+    if pathname == "/Workforce":
         return [
             filter_style,
             {"display": "block", "margin-bottom": "25px"},
             filter_style,
+            workforce_layout(styles),
+            the_app_theme
+        ]
 
-            [{"label": html.Span([i], style={'color': '#6499E9', 'font': "bold 16px arial", "margin": "12px 5px"}),
-              "value": i, } for i in departments],
+    return None
 
-            page_content,
 
-            the_app_theme
-        ]
+@app.callback(
+    Output(component_id="year-filter", component_property="options"),
+
+    Input(component_id="page-url", component_property="pathname"),
+)
+@timed_callback("sidebar")
+def update_year_options(pathname):
+    # Picks up the years of a reloaded dataset
+    return [
+        {"label": html.Span([i], style={'color': '#6499E9', 'font': "bold 16px arial", "margin": "12px 5px"}),
+         "value": i} for i in ["All Years", *dataset.years]
+    ]
+
+
+@app.callback(
+    Output(component_id="department-filter", component_property="options"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+)
+@timed_callback("sidebar")
+def update_department_options(year_value, filter_type):
+    departments = dataset.filter_index.departments(year_value, filter_type)
+    departments.insert(0, "All Departments")
+
+    return [{"label": html.Span([i], style={'color': '#6499E9', 'font': "bold 16px arial", "margin": "12px 5px"}),
+             "value": i, } for i in departments]
+
+
+def department_exists(year_value, filter_type, dep_value):
+    return dep_value == "All Departments" or dep_value in dataset.filter_index.departments(year_value, filter_type)
+
+
+# ====================== Home Page ================================
+@app.callback(
+    Output(component_id=kpi_card_id("emp-count-crd"), component_property="children"),
+    Output(component_id=kpi_card_id("available-pos-crd"), component_property="children"),
+    Output(component_id=kpi_card_id("salary-job-crd"), component_property="children"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+)
+@timed_callback("/")
+def update_home_cards(year_value, filter_type):
+    return create_home_cards(year_value, filter_type)
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("gender-chart"), component_property="figure"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/")
+def update_gender_chart(year_value, filter_type, target_theme):
+    return create_gender_chart(year_value, filter_type, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("emp-department-chart"), component_property="figure"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/")
+def update_emp_department_chart(year_value, filter_type, target_theme):
+    return create_emp_department_chart(year_value, filter_type, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("emp_education_chart"), component_property="figure"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/")
+def update_emp_education_chart(year_value, filter_type, target_theme):
+    return create_emp_education_chart(year_value, filter_type, get_chart_theme(target_theme))
+
+
+# ====================== Departments Page ================================
+@app.callback(
+    Output(component_id=chart_graph_id("salary-department-chart"), component_property="figure"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Departments")
+def update_salary_department_chart(year_value, filter_type, target_theme):
+    return create_salary_department_chart(year_value, filter_type, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("gender-department-chart"), component_property="figure"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Departments")
+def update_gender_department_chart(year_value, filter_type, target_theme):
+    return create_gender_department_chart(year_value, filter_type, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("dep-education-chart"), component_property="figure"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+    **background_options("dep-education-progress"),
+)
+@timed_callback("/Departments")
+@with_progress
+def update_dep_education_chart(set_progress, year_value, filter_type, target_theme):
+    set_progress("Counting employees by department and education")
+    return create_dep_education_level(year_value, filter_type, get_chart_theme(target_theme))
+
+
+# ====================== Locations =====================
+@app.callback(
+    Output(component_id=chart_graph_id("emp-locations-chart"), component_property="figure"),
+
+    Input(component_id="department-filter", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+    **background_options("locations-progress"),
+)
+@timed_callback("/Locations")
+@with_progress
+def update_location_map_chart(set_progress, dep_value, target_theme):
+    set_progress("Counting employees per state")
+    return create_location_map_chart(dep_value, get_chart_theme(target_theme))
+
+
+# ===================== Performance =====================
+@app.callback(
+    Output(component_id="performance-alert", component_property="children"),
+    Output(component_id="performance-body", component_property="style"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    Input(component_id="department-filter", component_property="value"),
+)
+@timed_callback("/Performance")
+def update_performance_alert(year_value, filter_type, dep_value):
+    if department_exists(year_value, filter_type, dep_value):
+        return None, {"display": "block"}
+    return get_alert(year_value, dep_value), {"display": "none"}
+
+
+@app.callback(
+    Output(component_id=kpi_card_id("performance-review-crd"), component_property="children"),
+    Output(component_id=kpi_card_id("turnover-crd"), component_property="children"),
+    Output(component_id=kpi_card_id("termination"), component_property="children"),
+    Output(component_id=kpi_card_id("promotions"), component_property="children"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    Input(component_id="department-filter", component_property="value"),
+)
+@timed_callback("/Performance")
+def update_performance_cards(year_value, filter_type, dep_value):
+    # The page shows an alert instead while the department does not exist
+    if not department_exists(year_value, filter_type, dep_value):
+        raise PreventUpdate
+    return create_performance_cards(year_value, filter_type, dep_value)
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("performance-department-chart"), component_property="figure"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    Input(component_id="department-filter", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Performance")
+def update_performance_department_chart(year_value, filter_type, dep_value, target_theme):
+    if not department_exists(year_value, filter_type, dep_value):
+        raise PreventUpdate
+    return create_performance_department_chart(year_value, filter_type, dep_value, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=employees_table_id, component_property="data"),
+    Output(component_id=employees_table_id, component_property="page_count"),
+    Output(component_id=employees_table_id, component_property="page_current"),
+
+    Input(component_id=employees_table_id, component_property="page_current"),
+    Input(component_id=employees_table_id, component_property="page_size"),
+    Input(component_id=employees_table_id, component_property="sort_by"),
+    Input(component_id=employees_table_id, component_property="filter_query"),
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    Input(component_id="department-filter", component_property="value"),
+    **background_options("employees-table-progress"),
+)
+@timed_callback("/Performance")
+@with_progress
+def update_employees_table(set_progress, page_current, page_size, sort_by, filter_query, year_value, filter_type,
+                           dep_value):
+    # A new sidebar filter starts again from the first page
+    if ctx.triggered_id in ("year-filter", "filter-type", "department-filter"):
+        page_current = 0
+    set_progress("Filtering and sorting employees")
+    return employees_table_page(year_value, filter_type, dep_value, page_current, page_size, sort_by, filter_query)
+
+
+@app.callback(
+    Output(component_id="export-csv", component_property="href"),
+    Output(component_id="export-parquet", component_property="href"),
+
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    Input(component_id="department-filter", component_property="value"),
+    Input(component_id=employees_table_id, component_property="filter_query"),
+    Input(component_id=employees_table_id, component_property="sort_by"),
+)
+@timed_callback("/Performance")
+def update_export_links(year_value, filter_type, dep_value, filter_query, sort_by):
+    return [export_url(file_format, year_value, filter_type, dep_value, filter_query, sort_by)
+            for file_format in ("csv", "parquet")]
+
+
+# ====================== Trends =====================
+@app.callback(
+    Output(component_id=chart_graph_id("headcount-chart"), component_property="figure"),
+
+    Input(component_id="department-filter", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Trends")
+def update_headcount_chart(dep_value, target_theme):
+    return create_headcount_chart(dep_value, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("movements-chart"), component_property="figure"),
+
+    Input(component_id="department-filter", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Trends")
+def update_movements_chart(dep_value, target_theme):
+    return create_movements_chart(dep_value, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("turnover-chart"), component_property="figure"),
+
+    Input(component_id="department-filter", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Trends")
+def update_turnover_chart(dep_value, target_theme):
+    return create_turnover_chart(dep_value, get_chart_theme(target_theme))
+
+
+# ====================== Cohorts =====================
+@app.callback(
+    Output(component_id=chart_graph_id("cohort-heatmap-chart"), component_property="figure"),
+
+    Input(component_id="department-filter", component_property="value"),
+    Input(component_id="termination-reason", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Cohorts")
+def update_cohort_heatmap_chart(dep_value, reason_value, target_theme):
+    return create_cohort_heatmap_chart(dep_value, reason_value, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("survival-chart"), component_property="figure"),
+
+    Input(component_id="department-filter", component_property="value"),
+    Input(component_id="termination-reason", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+)
+@timed_callback("/Cohorts")
+def update_survival_chart(dep_value, reason_value, target_theme):
+    return create_survival_chart(dep_value, reason_value, get_chart_theme(target_theme))
+
+
+# ====================== Workforce =====================
+workforce_inputs = [
+    Input(component_id="year-filter", component_property="value"),
+    Input(component_id="filter-type", component_property="value"),
+    Input(component_id="department-filter", component_property="value"),
+    Input(component_id="workforce-breakdown", component_property="value"),
+    Input(component_id="age-band-filter", component_property="value"),
+    Input(component_id="tenure-band-filter", component_property="value"),
+    Input(component_id="promotion-band-filter", component_property="value"),
+    State(component_id="theme-toggle", component_property="value"),
+]
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("workforce-count-chart"), component_property="figure"),
+    *workforce_inputs,
+)
+@timed_callback("/Workforce")
+def update_workforce_count_chart(year_value, filter_type, dep_value, breakdown, age_band, tenure_band, promotion_band,
+                                 target_theme):
+    return create_workforce_count_chart(year_value, filter_type, dep_value, breakdown, age_band, tenure_band,
+                                        promotion_band, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("workforce-salary-chart"), component_property="figure"),
+    *workforce_inputs,
+)
+@timed_callback("/Workforce")
+def update_workforce_salary_chart(year_value, filter_type, dep_value, breakdown, age_band, tenure_band, promotion_band,
+                                  target_theme):
+    return create_workforce_salary_chart(year_value, filter_type, dep_value, breakdown, age_band, tenure_band,
+                                         promotion_band, get_chart_theme(target_theme))
+
+
+@app.callback(
+    Output(component_id=chart_graph_id("workforce-performance-chart"), component_property="figure"),
+    *workforce_inputs,
+)
+@timed_callback("/Workforce")
+def update_workforce_performance_chart(year_value, filter_type, dep_value, breakdown, age_band, tenure_band,
+                                       promotion_band, target_theme):
+    return create_workforce_performance_chart(year_value, filter_type, dep_value, breakdown, age_band, tenure_band,
+                                              promotion_band, get_chart_theme(target_theme))
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="theme", function_name="switch_theme"),
+
+    Output(component_id="page-content", component_property="style", allow_duplicate=True),
+    Output(component_id={"type": "kpi-card", "index": ALL}, component_property="style"),
+    Output(component_id={"type": "kpi-value", "index": ALL}, component_property="style"),
+    Output(component_id={"type": "chart-graph", "index": ALL}, component_property="style"),
+    Output(component_id={"type": "chart-graph", "index": ALL}, component_property="figure", allow_duplicate=True),
+    Output(component_id={"type": "employees-table", "index": ALL}, component_property="style_header"),
+    Output(component_id={"type": "employees-table", "index": ALL}, component_property="style_data"),
+
+    Input(component_id="theme-toggle", component_property="value"),
+
+    State(component_id="page-content", component_property="style"),
+    State(component_id={"type": "kpi-card", "index": ALL}, component_property="id"),
+    State(component_id={"type": "kpi-value", "index": ALL}, component_property="id"),
+    State(component_id={"type": "chart-graph", "index": ALL}, component_property="figure"),
+    State(component_id={"type": "employees-table", "index": ALL}, component_property="id"),
+    State(component_id="theme-styles", component_property="data"),
+    prevent_initial_call=True,
+)
+
+
+# ----------- Cache Warm-up -----------
+class CacheWarmer:
+    """Renders every chart of every filter state into `figure_cache` on a background thread.
+
+    A dataset reload changes the cache keys, so the new version is warmed again.
+    `ready` becomes True after the first complete pass and stays True through later
+    ones, so a reload does not take the worker out of the load balancer; only a pass
+    whose charts did not all stay in the cache (FIGURE_CACHE_MAX_BYTES is too small)
+    reports the worker as not ready.
+    """
+
+    def __init__(self, enabled=False, poll_interval=1.0):
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.ready = not enabled
+        self.warmed_version = None
+        self.done = 0
+        self.total = 0
+        self.fits = True
+        self._thread = None
+
+    @staticmethod
+    def chart_calls(ds):
+        """(builder, args) of every cached chart the page callbacks can ask for."""
+        calls = []
+        # The default Light theme comes last, so it is the most recently used should anything be evicted
+        for chart_theme in ("plotly_dark", "plotly_white"):
+            for the_year in ["All Years", *ds.years]:
+                for filter_type in ("Until", "In"):
+                    for create_chart in (create_gender_chart, create_emp_department_chart, create_emp_education_chart,
+                                         create_salary_department_chart, create_gender_department_chart,
+                                         create_dep_education_level):
+                        calls.append((create_chart, (the_year, filter_type, chart_theme)))
+                    for the_dep in ["All Departments", *ds.filter_index.departments(the_year, filter_type)]:
+                        calls.append((create_performance_department_chart, (the_year, filter_type, the_dep, chart_theme)))
+            for the_dep in ["All Departments", *ds.departments]:
+                calls.append((create_location_map_chart, (the_dep, chart_theme)))
+                for create_chart in (create_headcount_chart, create_movements_chart, create_turnover_chart):
+                    calls.append((create_chart, (the_dep, chart_theme)))
+                for the_reason in ["All Reasons", *ds.cohort_matrix.reasons]:
+                    calls.append((create_cohort_heatmap_chart, (the_dep, the_reason, chart_theme)))
+                    calls.append((create_survival_chart, (the_dep, the_reason, chart_theme)))
+            # Only the unfiltered breakdowns, every band combination would not fit the cache
+            for breakdown in attribute_dims:
+                for create_chart in (create_workforce_count_chart, create_workforce_salary_chart,
+                                     create_workforce_performance_chart):
+                    calls.append((create_chart, ("All Years", "Until", "All Departments", breakdown,
+                                                 "All", "All", "All", chart_theme)))
+        return calls
+
+    def warm(self, ds):
+        """Builds every chart of `ds`; returns False when the dataset was replaced half-way."""
+        calls = self.chart_calls(ds)
+        self.done, self.total = 0, len(calls)
+        # Room for every warmed chart next to the ones requests add, so warming never evicts what it warmed
+        figure_cache.reserve(self.total + FIGURE_CACHE_MAX_ENTRIES)
+        evicted = figure_cache.evicted.get(ds.version, 0)
+
+        start = time.perf_counter()
+        token = pinned_dataset.set(ds)
+        try:
+            for create_chart, args in calls:
+                if dataset is not ds:
+                    return False
+                create_chart(*args)
+                self.done += 1
+        finally:
+            pinned_dataset.reset(token)
+        server.logger.info("Warmed up %d charts for dataset %s in %.1fs", self.total, ds.version,
+                           time.perf_counter() - start)
+
+        self.fits = figure_cache.evicted.get(ds.version, 0) == evicted
+        if not self.fits:
+            server.logger.error("The %d warmed charts of dataset %s do not fit in FIGURE_CACHE_MAX_BYTES=%d",
+                                self.total, ds.version, figure_cache.max_bytes)
+        return True
+
+    def run(self):
+        while True:
+            ds = dataset
+            if ds.version == self.warmed_version:
+                time.sleep(self.poll_interval)
+                continue
+            try:
+                if self.warm(ds):
+                    self.warmed_version = ds.version
+                    self.ready = self.fits
+            except Exception:
+                server.logger.exception("Warming up the figure cache failed")
+                time.sleep(self.poll_interval)
+
+    def start(self):
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="cache-warmer", daemon=True)
+            self._thread.start()
+
+
+# Pre-renders every filter combination after startup (FIGURE_CACHE_WARMUP=1 turns it on)
+cache_warmer = CacheWarmer(enabled=os.environ.get("FIGURE_CACHE_WARMUP", "0") == "1")
+cache_warmer.start()
+
+
+@server.route("/health")
+def health():
+    """Readiness of this worker: 503 until the figure cache warm-up has finished once."""
+    status = {
+        "ready": cache_warmer.ready,
+        "dataset": dataset.version,
+        "warmup": {"enabled": cache_warmer.enabled, "done": cache_warmer.done, "total": cache_warmer.total},
+    }
+    return jsonify(status), 200 if cache_warmer.ready else 503
 
 
 # Run The App
 if __name__ == "__main__":
+    dataset_watcher.start()
     app.run_server(debug=True)
@@ -0,0 +1,40 @@
+// Figures name their chart template ("plotly_white" / "plotly_dark") instead of embedding it;
+// the templates come once from /plotly-templates.js and are filled in here right before drawing
+(function () {
+    function withTemplate(layout) {
+        var templates = window.plotlyTemplates || {};
+        if (layout && typeof layout.template === "string" && templates[layout.template]) {
+            return Object.assign({}, layout, {template: templates[layout.template]});
+        }
+        return layout;
+    }
+
+    function wrap(plotly) {
+        if (!plotly || plotly.hrTemplates) {
+            return plotly;
+        }
+        ["newPlot", "react"].forEach(function (name) {
+            var draw = plotly[name];
+            plotly[name] = function (gd, data, layout, config) {
+                // dcc.Graph passes the whole figure as the second argument
+                if (data && !Array.isArray(data) && data.layout) {
+                    data = Object.assign({}, data, {layout: withTemplate(data.layout)});
+                } else {
+                    layout = withTemplate(layout);
+                }
+                return draw.call(this, gd, data, layout, config);
+            };
+        });
+        plotly.hrTemplates = true;
+        return plotly;
+    }
+
+    // Dash loads plotly.js on demand, so it is wrapped whenever it gets assigned
+    var plotly = wrap(window.Plotly);
+    Object.defineProperty(window, "Plotly", {
+        configurable: true,
+        enumerable: true,
+        get: function () { return plotly; },
+        set: function (value) { plotly = wrap(value); }
+    });
+})();
@@ -0,0 +1,26 @@
+// Restyles the current page for the chosen theme without a server round-trip
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    theme: {
+        switch_theme: function (theme, pageStyle, cardIds, valueIds, figures, tableIds, themeStyles) {
+            var styles = themeStyles[theme];
+
+            var themedFigures = figures.map(function (figure) {
+                if (!figure) {
+                    return figure;
+                }
+                var layout = Object.assign({}, figure.layout, {template: styles.template});
+                return Object.assign({}, figure, {layout: layout});
+            });
+
+            return [
+                Object.assign({}, pageStyle, {"background-color": styles.page["background-color"]}),
+                cardIds.map(function () { return styles.card; }),
+                valueIds.map(function () { return styles.card_value; }),
+                figures.map(function () { return styles.graph; }),
+                themedFigures,
+                tableIds.map(function () { return styles.table_header; }),
+                tableIds.map(function () { return styles.table_data; })
+            ];
+        }
+    }
+});
@@ -0,0 +1,321 @@
+# Callback Benchmarks For The HR Dashboard
+#
+#   python benchmark.py                                 # 1k, 100k and 1M rows, results in benchmark_results.json
+#   python benchmark.py --sizes 1000 --full             # every year / filter type / department combination
+#   python benchmark.py --compare old.json              # exits with 1 when anything got slower than --threshold
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Cold timings mean rendering, not reading another run's shared results
+os.environ["RENDER_CACHE_URL"] = ""
+
+import numpy as np
+import pandas as pd
+import plotly
+from plotly.utils import PlotlyJSONEncoder
+
+import app
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+
+# ----------- Synthetic Datasets -----------
+def synthetic_dataset(rows, seed=0):
+    """A typed dataset of `rows` employees drawn from HR_Final_Database.csv.
+
+    Whole rows are resampled, so the category distributions and the links between
+    columns (e.g. termination date and reason) match the real data; salaries and
+    dates are jittered and every employee gets a unique ID and name.
+    """
+    rng = np.random.default_rng(seed)
+    base = app.read_typed_csv(app.DATA_FILE)[app.dataset_columns]
+
+    data = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    data["ID"] = np.arange(1, rows + 1, dtype="int32")
+    data["Employee"] = data["Employee"] + " " + data["ID"].astype(str)
+    data["Salary"] = (data["Salary"] * rng.normal(1, 0.05, rows)).round().astype("int32")
+
+    # Hire, promotion and termination dates move together, so their order is kept
+    shift = pd.to_timedelta(rng.integers(-180, 181, rows), unit="D")
+    for col in ["Hire_Date", "Last_Promotion_Date", "Termination_Date"]:
+        data[col] = data[col] + shift
+    data["Birth_Date"] = data["Birth_Date"] + pd.to_timedelta(rng.integers(-365, 366, rows), unit="D")
+
+    data = data.sort_values("Hire_Date", kind="mergesort", ignore_index=True)
+    return app.add_derived_columns(data)
+
+
+# ----------- Measurements -----------
+def payload_size(result):
+    return len(json.dumps(result, cls=PlotlyJSONEncoder))
+
+
+def measure(func, *args, repeat=3):
+    """Best wall time (cold figure cache), peak traced memory and serialized size of one call."""
+    timings = []
+    for _ in range(repeat):
+        app.figure_cache.clear()
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+
+    app.figure_cache.clear()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_ms": round(min(timings) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "payload_bytes": payload_size(result),
+    }
+
+
+def table_page(the_year, filter_type, the_dep):
+    return app.employees_table_page(the_year, filter_type, the_dep, 0, 10, [], "")
+
+
+def sorted_filtered_table_page(the_year, filter_type, the_dep):
+    return app.employees_table_page(the_year, filter_type, the_dep, 0, 10,
+                                    [{"column_id": "Salary", "direction": "desc"}],
+                                    "{Gender} = Female && {Performance} >= 8")
+
+
+# Every builder with how it is called for (year, filter type, department, chart theme)
+builders = {
+    "create_home_cards": lambda y, ft, dep, theme: app.create_home_cards(y, ft),
+    "create_gender_chart": lambda y, ft, dep, theme: app.create_gender_chart(y, ft, theme),
+    "create_emp_department_chart": lambda y, ft, dep, theme: app.create_emp_department_chart(y, ft, theme),
+    "create_emp_education_chart": lambda y, ft, dep, theme: app.create_emp_education_chart(y, ft, theme),
+    "create_gender_department_chart": lambda y, ft, dep, theme: app.create_gender_department_chart(y, ft, theme),
+    "create_salary_department_chart": lambda y, ft, dep, theme: app.create_salary_department_chart(y, ft, theme),
+    "create_dep_education_level": lambda y, ft, dep, theme: app.create_dep_education_level(y, ft, theme),
+    "create_location_map_chart": lambda y, ft, dep, theme: app.create_location_map_chart(dep, theme),
+    "create_performance_cards": lambda y, ft, dep, theme: app.create_performance_cards(y, ft, dep),
+    "create_performance_department_chart":
+        lambda y, ft, dep, theme: app.create_performance_department_chart(y, ft, dep, theme),
+    "create_headcount_chart": lambda y, ft, dep, theme: app.create_headcount_chart(dep, theme),
+    "create_movements_chart": lambda y, ft, dep, theme: app.create_movements_chart(dep, theme),
+    "create_turnover_chart": lambda y, ft, dep, theme: app.create_turnover_chart(dep, theme),
+    "create_cohort_heatmap_chart": lambda y, ft, dep, theme: app.create_cohort_heatmap_chart(dep, "All Reasons", theme),
+    "create_survival_chart": lambda y, ft, dep, theme: app.create_survival_chart(dep, "All Reasons", theme),
+    "create_workforce_count_chart": lambda y, ft, dep, theme:
+        app.create_workforce_count_chart(y, ft, dep, "Age_Band", "All", "All", "All", theme),
+    "create_workforce_count_chart_filtered": lambda y, ft, dep, theme:
+        app.create_workforce_count_chart(y, ft, dep, "Tenure_Band", "25-34", "All", "Never Promoted", theme),
+    "employees_table_page": lambda y, ft, dep, theme: table_page(y, ft, dep),
+    "employees_table_page_sorted_filtered": lambda y, ft, dep, theme: sorted_filtered_table_page(y, ft, dep),
+}
+
+
+# Every callback a first visit of a route runs, with the sidebar values (year, filter type, department, theme)
+def home_page(y, ft, dep, theme):
+    return [
+        app.get_content_layout("/", theme),
+        app.update_home_cards(y, ft),
+        app.update_gender_chart(y, ft, theme),
+        app.update_emp_department_chart(y, ft, theme),
+        app.update_emp_education_chart(y, ft, theme),
+    ]
+
+
+def departments_page(y, ft, dep, theme):
+    return [
+        app.get_content_layout("/Departments", theme),
+        app.update_salary_department_chart(y, ft, theme),
+        app.update_gender_department_chart(y, ft, theme),
+        app.update_dep_education_chart(y, ft, theme),
+    ]
+
+
+def locations_page(y, ft, dep, theme):
+    return [
+        app.get_content_layout("/Locations", theme),
+        app.update_location_map_chart(dep, theme),
+    ]
+
+
+def performance_page(y, ft, dep, theme):
+    return [
+        app.get_content_layout("/Performance", theme),
+        app.update_performance_alert(y, ft, dep),
+        app.update_performance_cards(y, ft, dep),
+        app.update_performance_department_chart(y, ft, dep, theme),
+        table_page(y, ft, dep),
+    ]
+
+
+def trends_page(y, ft, dep, theme):
+    return [
+        app.get_content_layout("/Trends", theme),
+        app.update_headcount_chart(dep, theme),
+        app.update_movements_chart(dep, theme),
+        app.update_turnover_chart(dep, theme),
+    ]
+
+
+def cohorts_page(y, ft, dep, theme):
+    return [
+        app.get_content_layout("/Cohorts", theme),
+        app.update_cohort_heatmap_chart(dep, "All Reasons", theme),
+        app.update_survival_chart(dep, "All Reasons", theme),
+    ]
+
+
+def workforce_page(y, ft, dep, theme):
+    bands = ("Age_Band", "All", "All", "All")
+    return [
+        app.get_content_layout("/Workforce", theme),
+        app.update_workforce_count_chart(y, ft, dep, *bands, theme),
+        app.update_workforce_salary_chart(y, ft, dep, *bands, theme),
+        app.update_workforce_performance_chart(y, ft, dep, *bands, theme),
+    ]
+
+
+routes = {
+    "/": home_page,
+    "/Departments": departments_page,
+    "/Locations": locations_page,
+    "/Performance": performance_page,
+    "/Trends": trends_page,
+    "/Cohorts": cohorts_page,
+    "/Workforce": workforce_page,
+}
+
+
+def filter_combinations(ds, full=False):
+    """(year, filter type, department) states to time; a representative few unless `full`."""
+    if full:
+        years = ["All Years", *ds.years]
+        deps = ["All Departments", *ds.departments]
+    else:
+        years = ["All Years", ds.years[len(ds.years) // 2], ds.years[-1]]
+        deps = ["All Departments", ds.df["Department"].value_counts().index[0]]
+
+    for the_year in years:
+        for filter_type in ("Until", "In"):
+            for dep in deps:
+                if app.department_exists(the_year, filter_type, dep):
+                    yield the_year, filter_type, dep
+
+
+def run_size(rows, full=False, repeat=3, seed=0):
+    start = time.perf_counter()
+    data = synthetic_dataset(rows, seed)
+    generate_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.dataset = app.Dataset(data, f"synthetic-{rows}-{seed}")
+    build_s = time.perf_counter() - start
+
+    results = {
+        "rows": rows,
+        "generate_s": round(generate_s, 3),
+        "dataset_build_s": round(build_s, 3),
+        "builders": {},
+        "routes": {},
+    }
+    for the_year, filter_type, dep in filter_combinations(app.dataset, full):
+        for target_theme in ("Light", "Dark"):
+            chart_theme = app.get_chart_theme(target_theme)
+            state = f"{the_year}|{filter_type}|{dep}|{target_theme}"
+
+            for name, builder in builders.items():
+                results["builders"][f"{name}|{state}"] = measure(
+                    builder, the_year, filter_type, dep, chart_theme, repeat=repeat)
+            for route, page in routes.items():
+                results["routes"][f"{route}|{state}"] = measure(
+                    page, the_year, filter_type, dep, target_theme, repeat=repeat)
+    return results
+
+
+# ----------- Reporting -----------
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def summarize(results):
+    for size in results["sizes"]:
+        print(f"\n{size['rows']:>10,} rows  (generate {size['generate_s']}s, dataset build {size['dataset_build_s']}s)")
+        for group in ("builders", "routes"):
+            names = {}
+            for key, value in size[group].items():
+                names.setdefault(key.split("|")[0], []).append(value)
+            for name, values in names.items():
+                wall = [v["wall_ms"] for v in values]
+                print(f"  {name:<42} median {np.median(wall):9.2f} ms   max {max(wall):9.2f} ms   "
+                      f"peak {max(v['peak_kb'] for v in values):9.1f} KB   "
+                      f"payload {max(v['payload_bytes'] for v in values):8,} B")
+
+
+def compare(results, baseline, threshold):
+    """Prints every measurement slower than `threshold` x the baseline; returns how many there were."""
+    old_sizes = {size["rows"]: size for size in baseline["sizes"]}
+    regressions = 0
+    for size in results["sizes"]:
+        old = old_sizes.get(size["rows"])
+        if old is None:
+            continue
+        for group in ("builders", "routes"):
+            for key, value in size[group].items():
+                if key not in old[group]:
+                    continue
+                # Sub-millisecond timings are mostly noise
+                old_ms = max(old[group][key]["wall_ms"], 1.0)
+                ratio = value["wall_ms"] / old_ms
+                if ratio > threshold:
+                    regressions += 1
+                    print(f"REGRESSION {size['rows']:,} rows {key}: "
+                          f"{old[group][key]['wall_ms']} ms -> {value['wall_ms']} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the dashboard builders and page callbacks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="synthetic dataset rows")
+    parser.add_argument("--full", action="store_true", help="time every filter combination")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "plotly": plotly.__version__,
+            "full": args.full,
+        },
+        "sizes": [run_size(rows, args.full, args.repeat, args.seed) for rows in args.sizes],
+    }
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    summarize(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
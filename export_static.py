@@ -0,0 +1,396 @@
+# Static Export Of The HR Dashboard
+#
+#   python export_static.py                       # every page, filter and theme into static_site/
+#   python export_static.py --output /srv/hr      # then serve the directory with any static file server
+#
+# Every page state is rendered once by the app's own builders and written as a JSON payload;
+# index.html switches between them in the browser, so serving the export needs no Python at all.
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+from plotly.offline import get_plotlyjs
+from plotly.utils import PlotlyJSONEncoder
+
+import app
+
+THEMES = ["Light", "Dark"]
+FILTER_TYPES = ["Until", "In"]
+
+
+# ----------- Pages -----------
+# What every route shows, with the filters it depends on (year and filter type, department or both)
+def home_page(the_year, filter_type, the_dep, chart_theme):
+    return {
+        "cards": dict(zip(["emp-count-crd", "available-pos-crd", "salary-job-crd"],
+                          app.create_home_cards(the_year, filter_type))),
+        "figures": {
+            "gender-chart": app.create_gender_chart(the_year, filter_type, chart_theme),
+            "emp-department-chart": app.create_emp_department_chart(the_year, filter_type, chart_theme),
+            "emp_education_chart": app.create_emp_education_chart(the_year, filter_type, chart_theme),
+        },
+    }
+
+
+def departments_page(the_year, filter_type, the_dep, chart_theme):
+    return {
+        "figures": {
+            "salary-department-chart": app.create_salary_department_chart(the_year, filter_type, chart_theme),
+            "gender-department-chart": app.create_gender_department_chart(the_year, filter_type, chart_theme),
+            "dep-education-chart": app.create_dep_education_level(the_year, filter_type, chart_theme),
+        },
+    }
+
+
+def locations_page(the_year, filter_type, the_dep, chart_theme):
+    return {
+        "figures": {
+            "emp-locations-chart": app.create_location_map_chart(the_dep, chart_theme),
+        },
+    }
+
+
+def performance_page(the_year, filter_type, the_dep, chart_theme):
+    # The live table pages, sorts and filters on the server; the export keeps its first page
+    records, page_count, _ = app.employees_table_page(the_year, filter_type, the_dep, 0, 10, [], "")
+    return {
+        "cards": dict(zip(["performance-review-crd", "turnover-crd", "termination", "promotions"],
+                          app.create_performance_cards(the_year, filter_type, the_dep))),
+        "figures": {
+            "performance-department-chart":
+                app.create_performance_department_chart(the_year, filter_type, the_dep, chart_theme),
+        },
+        "table": {"columns": list(app.table_columns), "records": records, "page_count": page_count},
+    }
+
+
+def trends_page(the_year, filter_type, the_dep, chart_theme):
+    return {
+        "figures": {
+            "headcount-chart": app.create_headcount_chart(the_dep, chart_theme),
+            "movements-chart": app.create_movements_chart(the_dep, chart_theme),
+            "turnover-chart": app.create_turnover_chart(the_dep, chart_theme),
+        },
+    }
+
+
+def cohorts_page(the_year, filter_type, the_dep, chart_theme):
+    # Only the cohorts of every leaver; the live page also splits them by termination reason
+    return {
+        "figures": {
+            "cohort-heatmap-chart": app.create_cohort_heatmap_chart(the_dep, "All Reasons", chart_theme),
+            "survival-chart": app.create_survival_chart(the_dep, "All Reasons", chart_theme),
+        },
+    }
+
+
+def workforce_page(the_year, filter_type, the_dep, chart_theme):
+    # The page as it opens, by age band without band filters
+    bands = ("Age_Band", "All", "All", "All")
+    return {
+        "figures": {
+            "workforce-count-chart":
+                app.create_workforce_count_chart(the_year, filter_type, the_dep, *bands, chart_theme),
+            "workforce-salary-chart":
+                app.create_workforce_salary_chart(the_year, filter_type, the_dep, *bands, chart_theme),
+            "workforce-performance-chart":
+                app.create_workforce_performance_chart(the_year, filter_type, the_dep, *bands, chart_theme),
+        },
+    }
+
+
+pages = {
+    "/": {"name": "home", "title": "HR Analysis", "filters": ["year"], "render": home_page,
+          "cards": {"emp-count-crd": "Employees", "available-pos-crd": "Available Positions",
+                    "salary-job-crd": "Average Salary"},
+          "rows": [["gender-chart", "emp-department-chart"], ["emp_education_chart"]]},
+    "/Departments": {"name": "departments", "title": "Departments", "filters": ["year"], "render": departments_page,
+                     "rows": [["salary-department-chart", "gender-department-chart"], ["dep-education-chart"]]},
+    "/Locations": {"name": "locations", "title": "Locations", "filters": ["department"], "render": locations_page,
+                   "rows": [["emp-locations-chart"]]},
+    "/Performance": {"name": "performance", "title": "Performance", "filters": ["year", "department"],
+                     "render": performance_page,
+                     "cards": {"performance-review-crd": "Performance Rate", "turnover-crd": "Turnover Rate",
+                               "termination": "Terminated Employees", "promotions": "Promoted Employees"},
+                     "rows": [["performance-department-chart"]]},
+    "/Trends": {"name": "trends", "title": "Headcount & Turnover", "filters": ["department"], "render": trends_page,
+                "rows": [["headcount-chart"], ["movements-chart", "turnover-chart"]]},
+    "/Cohorts": {"name": "cohorts", "title": "Cohort Retention", "filters": ["department"], "render": cohorts_page,
+                 "rows": [["cohort-heatmap-chart"], ["survival-chart"]]},
+    "/Workforce": {"name": "workforce", "title": "Workforce Profile", "filters": ["year", "department"],
+                   "render": workforce_page,
+                   "rows": [["workforce-count-chart"], ["workforce-salary-chart", "workforce-performance-chart"]]},
+}
+
+
+def slug(value):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(value)).strip("-").lower()
+
+
+def state_file(page, target_theme, the_year, filter_type, the_dep):
+    """Payload path of a page state; the filters a page ignores are left out of the name."""
+    parts = [page["name"], slug(target_theme)]
+    if "year" in page["filters"]:
+        parts += [slug(the_year), slug(filter_type)]
+    if "department" in page["filters"]:
+        parts.append(slug(the_dep))
+    return f"data/{'-'.join(parts)}.json"
+
+
+def page_states(page, ds):
+    """(year, filter type, department) of every state of a page, as the sidebar can select them."""
+    years = ["All Years", *ds.years] if "year" in page["filters"] else ["All Years"]
+    filter_types = FILTER_TYPES if "year" in page["filters"] else ["Until"]
+    for the_year in years:
+        for filter_type in filter_types:
+            if "department" not in page["filters"]:
+                yield the_year, filter_type, "All Departments"
+                continue
+            # Like the live sidebar, only departments with hires in the chosen years are offered
+            for the_dep in ["All Departments", *ds.filter_index.departments(the_year, filter_type)]:
+                yield the_year, filter_type, the_dep
+
+
+# ----------- Export -----------
+def write_json(path, payload):
+    with open(path, "w") as file:
+        json.dump(payload, file, cls=PlotlyJSONEncoder, separators=(",", ":"))
+
+
+def export(output):
+    ds = app.dataset
+    os.makedirs(os.path.join(output, "data"), exist_ok=True)
+
+    manifest = {
+        "dataset": ds.version,
+        "exported": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "years": ["All Years", *ds.years],
+        "filter_types": FILTER_TYPES,
+        "departments": {
+            f"{the_year}|{filter_type}": ["All Departments", *ds.filter_index.departments(the_year, filter_type)]
+            for the_year in ["All Years", *ds.years] for filter_type in FILTER_TYPES
+        },
+        # Figures name their chart template, which is stored here once instead of in every payload
+        "templates": {app.get_chart_theme(target_theme): app.pio.templates[app.get_chart_theme(target_theme)]
+                      for target_theme in THEMES},
+        "themes": {target_theme: {key: value for key, value in app.get_theme_styles(target_theme).items()
+                                  if key != "chart_theme"} for target_theme in THEMES},
+        "pages": {},
+    }
+
+    files = 0
+    for pathname, page in pages.items():
+        states = {}
+        for target_theme in THEMES:
+            chart_theme = app.get_chart_theme(target_theme)
+            for the_year, filter_type, the_dep in page_states(page, ds):
+                path = state_file(page, target_theme, the_year, filter_type, the_dep)
+                write_json(os.path.join(output, path), page["render"](the_year, filter_type, the_dep, chart_theme))
+                files += 1
+                states[f"{target_theme}|{the_year}|{filter_type}|{the_dep}"] = path
+        manifest["pages"][pathname] = {
+            "title": page["title"],
+            "filters": page["filters"],
+            "cards": page.get("cards", {}),
+            "rows": page["rows"],
+            "states": states,
+        }
+
+    write_json(os.path.join(output, "manifest.json"), manifest)
+    with open(os.path.join(output, "plotly.min.js"), "w") as file:
+        file.write(get_plotlyjs())
+    with open(os.path.join(output, "index.html"), "w") as file:
+        file.write(INDEX_HTML)
+    return files
+
+
+# ----------- HTML Shell -----------
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>HR Analysis</title>
+<script src="plotly.min.js"></script>
+<style>
+  body { margin: 0; font-family: arial, sans-serif; }
+  #sidebar { position: fixed; top: 0; left: 0; bottom: 0; width: 15rem; padding: 2rem 1rem;
+             box-sizing: border-box; background: #f8f9fa; overflow-y: auto; }
+  #sidebar h2 { font: bold 28px tahoma; margin-top: 0; }
+  #sidebar a { display: block; padding: 8px 12px; margin-bottom: 4px; border-radius: 5px;
+               color: #2fa4e7; text-decoration: none; font: bold 16px arial; }
+  #sidebar a.active { background: #2fa4e7; color: #fff; }
+  #sidebar label { display: block; margin: 18px 0 6px; font: bold 14px arial; color: #555; }
+  #sidebar select { width: 100%; padding: 6px; font: bold 15px arial; color: #6499E9; }
+  .row { display: flex; gap: 12px; margin-bottom: 12px; }
+  .row > * { flex: 1; min-width: 0; }
+  .card-title { font: bold 18px tahoma; margin: 8px 0 0; }
+  h1 { font: bold 40px arial; text-align: center; }
+  table { width: 100%; border-collapse: collapse; }
+  th, td { padding: 8px 10px; text-align: left; border-bottom: 1px solid rgba(128, 128, 128, .3); }
+  .alert { padding: 16px; border-radius: 5px; background: #fff3cd; color: #664d03; font: bold 18px arial; }
+</style>
+</head>
+<body>
+<div id="sidebar">
+  <h2>HR Analysis</h2>
+  <nav id="pages"></nav>
+  <label for="theme">Theme</label><select id="theme"></select>
+  <div id="year-filters">
+    <label for="year">Year</label><select id="year"></select>
+    <label for="filter-type">Filter</label><select id="filter-type"></select>
+  </div>
+  <div id="department-filter">
+    <label for="department">Department</label><select id="department"></select>
+  </div>
+</div>
+<div id="content"></div>
+<script>
+(async function () {
+  const manifest = await (await fetch("manifest.json")).json();
+  const $ = (id) => document.getElementById(id);
+  const state = {page: location.hash.slice(1) || "/", theme: "Light", year: "All Years",
+                 filterType: "Until", department: "All Departments"};
+
+  function fill(select, values, current) {
+    select.innerHTML = "";
+    for (const value of values) select.add(new Option(value, value, false, String(value) === String(current)));
+  }
+
+  function applyStyle(element, style) {
+    for (const [key, value] of Object.entries(style)) element.style.setProperty(key, value);
+  }
+
+  function formatValue(value) {
+    return typeof value === "number" ? value.toLocaleString("en-US") : value;
+  }
+
+  async function render() {
+    const page = manifest.pages[state.page] || manifest.pages["/"];
+    const styles = manifest.themes[state.theme];
+    // Filters a page does not use keep their defaults, so e.g. Locations offers every department
+    const year = page.filters.includes("year") ? state.year : "All Years";
+    const filterType = page.filters.includes("year") ? state.filterType : "Until";
+    const departments = manifest.departments[year + "|" + filterType];
+    const department = page.filters.includes("department") ? state.department : "All Departments";
+
+    $("year-filters").style.display = page.filters.includes("year") ? "block" : "none";
+    $("department-filter").style.display = page.filters.includes("department") ? "block" : "none";
+    fill($("department"), departments, department);
+    for (const link of $("pages").children) link.classList.toggle("active", link.dataset.page === state.page);
+
+    const content = $("content");
+    content.removeAttribute("style");
+    applyStyle(content, styles.page);
+    content.innerHTML = "";
+    const title = document.createElement("h1");
+    title.textContent = page.title;
+    content.appendChild(title);
+
+    const key = [state.theme, year, filterType, department].join("|");
+    const path = page.states[key];
+    if (!path) {
+      const alert = document.createElement("div");
+      alert.className = "alert";
+      alert.textContent = "The Department " + department + " Did Not Exist In " + year + ". Choose Another Department";
+      content.appendChild(alert);
+      return;
+    }
+    const payload = await (await fetch(path)).json();
+
+    const cards = Object.entries(page.cards);
+    if (cards.length) {
+      const row = document.createElement("div");
+      row.className = "row";
+      for (const [cardId, cardTitle] of cards) {
+        const card = document.createElement("div");
+        applyStyle(card, styles.card);
+        const value = document.createElement("h3");
+        applyStyle(value, styles.card_value);
+        value.textContent = formatValue(payload.cards[cardId]);
+        const label = document.createElement("h3");
+        label.className = "card-title";
+        label.textContent = cardTitle;
+        card.append(value, label);
+        row.appendChild(card);
+      }
+      content.appendChild(row);
+    }
+
+    for (const graphIds of page.rows) {
+      const row = document.createElement("div");
+      row.className = "row";
+      content.appendChild(row);
+      for (const graphId of graphIds) {
+        const graph = document.createElement("div");
+        graph.id = graphId;
+        applyStyle(graph, styles.graph);
+        row.appendChild(graph);
+        const figure = payload.figures[graphId];
+        const layout = Object.assign({}, figure.layout, {template: manifest.templates[figure.layout.template]});
+        Plotly.newPlot(graph, figure.data, layout, {responsive: true});
+      }
+    }
+
+    if (payload.table) {
+      const table = document.createElement("table");
+      const header = table.createTHead().insertRow();
+      for (const column of payload.table.columns) {
+        const cell = document.createElement("th");
+        applyStyle(cell, styles.table_header);
+        cell.textContent = column;
+        header.appendChild(cell);
+      }
+      const body = table.createTBody();
+      for (const record of payload.table.records) {
+        const row = body.insertRow();
+        for (const column of payload.table.columns) {
+          const cell = row.insertCell();
+          applyStyle(cell, styles.table_data);
+          cell.textContent = formatValue(record[column] ?? "");
+        }
+      }
+      content.appendChild(table);
+    }
+  }
+
+  for (const [pathname, page] of Object.entries(manifest.pages)) {
+    const link = document.createElement("a");
+    link.href = "#" + pathname;
+    link.dataset.page = pathname;
+    link.textContent = pathname === "/" ? "Home" : page.title;
+    $("pages").appendChild(link);
+  }
+  fill($("theme"), Object.keys(manifest.themes), state.theme);
+  fill($("year"), manifest.years, state.year);
+  fill($("filter-type"), manifest.filter_types, state.filterType);
+
+  window.addEventListener("hashchange", () => { state.page = location.hash.slice(1) || "/"; render(); });
+  $("theme").addEventListener("change", (e) => { state.theme = e.target.value; render(); });
+  $("year").addEventListener("change", (e) => { state.year = e.target.value; render(); });
+  $("filter-type").addEventListener("change", (e) => { state.filterType = e.target.value; render(); });
+  $("department").addEventListener("change", (e) => { state.department = e.target.value; render(); });
+  render();
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-renders every dashboard page, filter and theme as static files.")
+    parser.add_argument("--output", default="static_site", help="directory to write the site to")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    files = export(args.output)
+    print(f"Exported {files} page states of dataset {app.dataset.version} to {args.output}/ "
+          f"in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+# Gunicorn Settings For The HR Dashboard
+#
+#   gunicorn app:server            # picks this file up from the working directory
+
+
+def post_fork(server, worker):
+    # Each worker reloads its own copy of the data; scripts importing app never start a watcher
+    from app import dataset_watcher
+
+    dataset_watcher.start()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Importing app loads the bundled CSV; the tests never need its shared, memory-mapped copy
+os.environ["HR_SHARED_DATASET_DIR"] = ""
+os.environ["RENDER_CACHE_URL"] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
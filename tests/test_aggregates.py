@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+@pytest.fixture(scope="module")
+def data():
+    return app.dataset.df
+
+
+@pytest.mark.parametrize("the_year, filter_type", [("All Years", "Until"), (2015, "Until"), (2015, "In"), (2011, "In"), (1990, "In")])
+@pytest.mark.parametrize("the_dep", ["All Departments", "Technology", "No Such Department"])
+def test_cube_counts_match_groupby(data, the_year, filter_type, the_dep):
+    dims = ["Department", "Gender", "Education"]
+    rows = data.dropna(subset=dims)
+    if the_year != "All Years":
+        rows = rows[rows["Hire_Year"] == the_year] if filter_type == "In" else rows[rows["Hire_Year"] <= the_year]
+    if the_dep != "All Departments":
+        rows = rows[rows["Department"] == the_dep]
+
+    cube = app.dataset.hr_cube
+    assert cube.totals("count", the_year, filter_type, the_dep) == len(rows)
+    assert cube.totals("salary", the_year, filter_type, the_dep) == pytest.approx(rows["Salary"].sum())
+
+    expected = rows.groupby("Gender", observed=True).size()
+    by_gender = cube.totals("count", the_year, filter_type, the_dep, by=("Gender",))
+    pd.testing.assert_series_equal(by_gender[by_gender > 0], expected, check_names=False, check_dtype=False,
+                                   check_index_type=False, check_categorical=False)
+
+
+def test_cube_two_dims_and_where_match_groupby(data):
+    rows = data.dropna(subset=["Department", "Gender", "Education"])
+    rows = rows[(rows["Hire_Year"] <= 2018) & (rows["Gender"] == "Female")]
+    expected = rows.pivot_table(index="Education", columns="Department", values="Salary",
+                                aggfunc="sum", fill_value=0, observed=True)
+
+    totals = app.dataset.hr_cube.totals("salary", 2018, "Until", by=("Education", "Department"),
+                                        where={"Gender": "Female"})
+    totals = totals.loc[expected.index, expected.columns]
+    np.testing.assert_allclose(totals.to_numpy(), expected.to_numpy())
+
+
+def retention_tables(cohorts):
+    return {
+        (the_dep, the_reason): cohorts.retention(the_dep, the_reason)
+        for the_dep in ["All Departments", *cohorts.departments]
+        for the_reason in ["All Reasons", *cohorts.reasons]
+    }
+
+
+@pytest.mark.parametrize("split", [1, 0.5, 0.99])
+@pytest.mark.parametrize("shuffled", [False, True])
+def test_cohorts_extended_match_a_full_rebuild(data, split, shuffled):
+    rows = data.sample(frac=1, random_state=7) if shuffled else data
+    stop = split if isinstance(split, int) else int(len(rows) * split)
+    first, rest = rows.iloc[:stop], rows.iloc[stop:]
+
+    base = app.CohortMatrix.from_rows(first)
+    before = retention_tables(base)
+    extended = base.extended(rest)
+    rebuilt = app.CohortMatrix.from_rows(rows)
+
+    assert sorted(extended.departments) == sorted(rebuilt.departments)
+    assert sorted(extended.reasons) == sorted(rebuilt.reasons)
+    expected = retention_tables(rebuilt)
+    for key, table in retention_tables(extended).items():
+        pd.testing.assert_frame_equal(table, expected[key])
+
+    # The version being extended is left as it was
+    for key, table in retention_tables(base).items():
+        pd.testing.assert_frame_equal(table, before[key])
+
+
+def test_promotions_after_the_last_day_are_not_never_promoted():
+    data = pd.DataFrame({
+        "Hire_Date": pd.to_datetime(["2015-01-10", "2015-01-10", "2015-01-10"]),
+        "Last_Promotion_Date": pd.to_datetime(["2019-06-01", None, "2017-03-15"]),
+        "Termination_Date": pd.to_datetime(["2019-01-31", "2019-01-31", None]),
+    })
+    months = app.months_between(data["Last_Promotion_Date"], data["Termination_Date"].fillna(pd.Timestamp("2019-01-31")))
+    assert months.tolist() == [0, -1, 22]
+    assert app.band(months, app.PROMOTION_BANDS).tolist() == ["Under 1 Year", "Never Promoted", "1-2 Years"]
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize("filter_part, expected", [
+    ("{Salary} >= 5000", ("Salary", "ge", 5000.0)),
+    ("{Salary} s< 5000", ("Salary", "lt", 5000.0)),
+    ("{Salary} != 5000", ("Salary", "ne", 5000.0)),
+    ("{Gender} = Male", ("Gender", "eq", "Male")),
+    ("{Gender} i= male", ("Gender", "ieq", "male")),
+    ("{City} icontains rock", ("City", "icontains", "rock")),
+    ("{City} contains Little Rock", ("City", "contains", "Little Rock")),
+    ("{Employee} contains 'le gt'", ("Employee", "contains", "le gt")),
+    ('{Employee} eq "Jo \\"JJ\\" Lee"', ("Employee", "eq", 'Jo "JJ" Lee')),
+    ("{Education} datestartswith Ba", ("Education", "datestartswith", "Ba")),
+])
+def test_split_filter_part(filter_part, expected):
+    assert app.split_filter_part(filter_part) == expected
+
+
+@pytest.mark.parametrize("filter_part", ["", "Salary >= 5000", "{Salary} between 1 and 2", "{City} containsRock"])
+def test_split_filter_part_rejects_malformed_parts(filter_part):
+    assert app.split_filter_part(filter_part) == [None, None, None]
+
+
+@pytest.fixture
+def employees():
+    return pd.DataFrame({
+        "Employee": ["Ann Lee", "bob Ray", "Cid Moe", "Dee Lee", None],
+        "Gender": ["Female", "Male", "male", "Female", "Male"],
+        "Education": ["Bachelor", "Master", "Bachelor", None, "PhD"],
+        "City": ["Texas", "Little Rock", "texas", "Ohio", "Texas"],
+        "Performance_Review": [3, 5, 4, 5, 1],
+        "Salary": [4000, 5200, 6100, 5200, 3900],
+    })
+
+
+@pytest.fixture
+def store(employees):
+    return app.EmployeeTableStore(employees, app.table_columns)
+
+
+@pytest.mark.parametrize("filter_query, expected", [
+    ("", [0, 1, 2, 3, 4]),
+    ("{Salary} >= 5200", [1, 2, 3]),
+    ("{Salary} contains 52", [1, 3]),
+    ("{Gender} = Male", [1, 4]),
+    ("{Gender} i= MALE", [1, 2, 4]),
+    ("{City} contains exas", [0, 2, 4]),
+    ("{City} icontains TEX", [0, 2, 4]),
+    ("{City} contains TEX", []),
+    ("{Employee} contains Lee && {Performance} > 3", [3]),
+    ("{Education} datestartswith Ba", [0, 2]),
+    ("{Education} ne Bachelor", [1, 4]),
+    ("{Unknown} = x", [0, 1, 2, 3, 4]),
+])
+def test_query_filters(store, filter_query, expected):
+    assert store.query(np.arange(5), filter_query).tolist() == expected
+
+
+def test_query_keeps_to_the_given_rows(store):
+    assert store.query(slice(1, 4), "{Salary} > 4000").tolist() == [1, 2, 3]
+
+
+@pytest.mark.parametrize("sort_by", [
+    [{"column_id": "Salary", "direction": "desc"}],
+    [{"column_id": "City", "direction": "asc"}],
+    [{"column_id": "Salary", "direction": "asc"}, {"column_id": "Employee", "direction": "desc"}],
+])
+def test_query_sorts_like_pandas(employees, store, sort_by):
+    columns = [app.table_columns[col["column_id"]] for col in sort_by]
+    ascending = [col["direction"] == "asc" for col in sort_by]
+    expected = employees.sort_values(columns, ascending=ascending, kind="stable").index
+
+    positions = store.query(np.arange(5), "", sort_by)
+    assert employees.loc[positions, columns].fillna("").values.tolist() == \
+        employees.loc[expected, columns].fillna("").values.tolist()